@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import re
+from difflib import SequenceMatcher
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+
+# Collects visible interactive elements with the attributes a selector is usually built from.
+# Scripts, styles, <head> and hidden nodes never make it into the prompt.
+EXTRACT_CANDIDATES_JS = """
+(maxElements) => {
+    const query = 'input:not([type=hidden]), textarea, select, button, a[href], ' +
+                  '[role=button], [role=link], [role=textbox], [role=checkbox], [contenteditable=true]';
+    const clean = (text) => (text || '').replace(/\\s+/g, ' ').trim().slice(0, 80);
+    const isVisible = (el) => {
+        const style = window.getComputedStyle(el);
+        const rect = el.getBoundingClientRect();
+        return style.display !== 'none' && style.visibility !== 'hidden' && rect.width > 0 && rect.height > 0;
+    };
+    const xpathOf = (el) => {
+        const parts = [];
+        for (; el && el.nodeType === Node.ELEMENT_NODE; el = el.parentNode) {
+            let index = 1;
+            for (let sibling = el.previousElementSibling; sibling; sibling = sibling.previousElementSibling) {
+                if (sibling.tagName === el.tagName) index++;
+            }
+            parts.unshift(el.tagName.toLowerCase() + '[' + index + ']');
+        }
+        return '/' + parts.join('/');
+    };
+    const labelOf = (el) => {
+        if (el.labels && el.labels.length) return clean(el.labels[0].innerText);
+        const parentLabel = el.closest('label');
+        return parentLabel ? clean(parentLabel.innerText) : '';
+    };
+
+    const candidates = [];
+    for (const el of document.querySelectorAll(query)) {
+        if (!isVisible(el)) continue;
+        const candidate = {tag: el.tagName.toLowerCase(), xpath: xpathOf(el)};
+        for (const attr of ['id', 'name', 'type', 'placeholder', 'aria-label', 'data-testid', 'value']) {
+            const value = el.getAttribute(attr);
+            if (value) candidate[attr] = clean(value);
+        }
+        if (el.classList.length) candidate['class'] = Array.from(el.classList).slice(0, 8).join(' ');
+        const label = labelOf(el);
+        if (label) candidate.label = label;
+        if (['button', 'a'].includes(candidate.tag) || el.getAttribute('role')) {
+            const text = clean(el.innerText);
+            if (text) candidate.text = text;
+        }
+        candidates.push(candidate);
+        if (candidates.length >= maxElements) break;
+    }
+    return candidates;
+}
+"""
+
+# Attributes compared against the values found in the failed selector
+MATCH_ATTRIBUTES = ("id", "name", "placeholder", "aria-label", "data-testid", "label", "text", "value", "class")
+
+CSS_TAG = re.compile(r'^\s*([a-zA-Z][\w-]*)')
+CSS_ATTRIBUTE = re.compile(r'\[\s*([\w-]+)\s*[~|^$*]?=\s*["\']?([^"\'\]]+)["\']?\s*\]')
+CSS_ID = re.compile(r'#([\w-]+)')
+CSS_CLASS = re.compile(r'\.([\w-]+)')
+CSS_CLASS_NAME = re.compile(r'^-?[_a-zA-Z][\w-]*$')
+XPATH_TAG = re.compile(r'^\(?\s*/{1,2}([a-zA-Z][\w-]*)')
+XPATH_ATTRIBUTE = re.compile(r'@([\w-]+)\s*=\s*["\']([^"\']+)["\']')
+XPATH_TEXT = re.compile(r'(?:text\(\)|\.)\s*[,=]\s*["\']([^"\']+)["\']')
+TEXT_SELECTOR = re.compile(r'^text\s*=\s*["\']?([^"\']+)["\']?$')
+MARKUP_NOISE = re.compile(r'<(script|style|head|noscript|svg)\b.*?</\1>|<!--.*?-->', re.DOTALL | re.IGNORECASE)
+
+
+def parse_selector(selector: str) -> dict:
+    """Pull the tag, attribute constraints and text out of a CSS, XPath or text= selector."""
+    selector = (selector or "").strip()
+    if selector.startswith("xpath="):
+        selector = selector[len("xpath="):]
+    if selector.startswith("css="):
+        selector = selector[len("css="):]
+
+    target = {"tag": None, "attributes": {}, "text": None}
+
+    text_match = TEXT_SELECTOR.match(selector)
+    if text_match:
+        target["text"] = text_match.group(1)
+        return target
+
+    if selector.startswith("/") or selector.startswith("("):
+        tag = XPATH_TAG.match(selector)
+        target["tag"] = tag.group(1).lower() if tag and tag.group(1) != "*" else None
+        target["attributes"] = {name.lower(): value for name, value in XPATH_ATTRIBUTE.findall(selector)}
+        text = XPATH_TEXT.search(selector)
+        target["text"] = text.group(1) if text else None
+        return target
+
+    # CSS: only the last compound selector identifies the element itself
+    last = re.split(r'\s*[>+~]\s*|\s+', selector)[-1]
+    tag = CSS_TAG.match(last)
+    target["tag"] = tag.group(1).lower() if tag else None
+    target["attributes"] = {name.lower(): value for name, value in CSS_ATTRIBUTE.findall(last)}
+    element_id = CSS_ID.search(CSS_ATTRIBUTE.sub("", last))
+    if element_id:
+        target["attributes"]["id"] = element_id.group(1)
+    classes = CSS_CLASS.findall(CSS_ATTRIBUTE.sub("", last))
+    if classes:
+        target["attributes"]["class"] = " ".join(classes)
+    return target
+
+
+def similarity(a, b) -> float:
+    if not a or not b:
+        return 0.0
+    a, b = str(a).lower(), str(b).lower()
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def class_similarity(wanted, classes) -> float:
+    """Share of the selector's classes the element still has; class order does not matter."""
+    wanted, classes = set(str(wanted or "").lower().split()), set(str(classes or "").lower().split())
+    return len(wanted & classes) / len(wanted) if wanted else 0.0
+
+
+def score_candidate(candidate: dict, target: dict) -> float:
+    """Score 0..1 of how likely `candidate` is the element the failed selector meant."""
+    wanted = dict(target["attributes"])
+    if target["text"]:
+        wanted["text"] = target["text"]
+
+    scores = []
+    for attribute, value in wanted.items():
+        # The same attribute counts fully, a match on any other attribute counts less
+        if attribute == "class":
+            best = class_similarity(value, candidate.get("class"))
+        else:
+            best = similarity(value, candidate.get(attribute))
+        for other in MATCH_ATTRIBUTES:
+            if other != attribute:
+                best = max(best, 0.8 * similarity(value, candidate.get(other)))
+        scores.append(best)
+    # Every constraint of the selector has to fit, e.g. both name and value of a radio button
+    best = sum(scores) / len(scores) if scores else 0.0
+
+    if target["tag"]:
+        return 0.8 * best + (0.2 if candidate.get("tag") == target["tag"] else 0.0)
+    return best
+
+
+def rank_candidates(candidates: list, selector: str, limit: int = None) -> list:
+    target = parse_selector(selector)
+    ranked = sorted(
+        ({**candidate, "score": round(score_candidate(candidate, target), 3)} for candidate in candidates),
+        key=lambda candidate: candidate["score"],
+        reverse=True
+    )
+    return ranked[:limit] if limit else ranked
+
+
+def extract_candidates(page: Page, max_elements: int = 500) -> list:
+    return page.evaluate(EXTRACT_CANDIDATES_JS, max_elements)
+
+
+def prune_html(html: str, limit: int = 8000) -> str:
+    """Fallback context when candidates cannot be extracted: markup without scripts, styles and <head>."""
+    html = MARKUP_NOISE.sub("", html)
+    body = re.search(r'<body\b.*?</body>', html, re.DOTALL | re.IGNORECASE)
+    html = body.group(0) if body else html
+    return re.sub(r'\s+', ' ', html)[:limit]
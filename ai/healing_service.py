@@ -0,0 +1,277 @@
+"""
+Local AI healing service shared by all parallel workers of a run.
+
+Workers send heal prompts over a Unix socket instead of calling Ollama themselves. The service
+deduplicates identical requests (same heal key) so only one model call is made and every waiting
+worker gets its answer, collects requests arriving within a short window into a batch that is sent
+to the model concurrently (served together when Ollama runs with OLLAMA_NUM_PARALLEL), keeps the
+model loaded between heals and unloads it once when the run ends.
+
+Answers are streamed to every waiting worker, which validates the selector objects against its own page
+and disconnects once one is valid; the model is stopped as soon as no worker is listening any more.
+
+Protocol: one JSON request line from the worker, then {"chunk": ...} lines and a final {"done": true}
+or {"error": ...} line from the service.
+"""
+import os
+import json
+import time
+import queue
+import socket
+import tempfile
+import threading
+import socketserver
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from ai.streaming import read_until_selector, ollama_text_chunks
+from utils.logger import log_info_emoji, log_error
+
+SOCKET_ENV = "AI_HEALING_SOCKET"
+
+
+def healing_service_available():
+    return hasattr(socket, "AF_UNIX")
+
+
+class _Generation:
+    """Streamed answer of one model call, replayed in full to every worker that asked for it."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.listeners = 0
+        self.condition = threading.Condition()
+
+    def join(self):
+        with self.condition:
+            self.listeners += 1
+        return self
+
+    def leave(self):
+        with self.condition:
+            self.listeners -= 1
+
+    @property
+    def abandoned(self):
+        return self.listeners <= 0
+
+    def add(self, chunk):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def follow(self):
+        """Every chunk, as it arrives, until the answer is complete."""
+        index = 0
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: len(self.chunks) > index or self.done)
+                new_chunks = self.chunks[index:]
+                done = self.done
+            index += len(new_chunks)
+            yield from new_chunks
+            if done and index == len(self.chunks):
+                return
+
+
+class HealingService:
+
+    def __init__(self, model, keep_alive="30m", parallel=2, batch_window=0.05):
+        self.model = model
+        self.keep_alive = keep_alive
+        self.batch_window = batch_window
+        self.requests = queue.Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max(parallel, 1))
+        self.model_used = False
+        threading.Thread(target=self._dispatch, daemon=True).start()
+
+    def submit(self, request):
+        """Queue a heal request, or join the identical one already in flight. The caller has to `leave()` it."""
+        key = request.get("key") or request["prompt"]
+        with self.lock:
+            if key in self.pending:
+                log_info_emoji("🔗", f"Joined in-flight heal request: {key}")
+                return self.pending[key].join()
+            generation = _Generation().join()
+            self.pending[key] = generation
+        self.requests.put((key, request, generation))
+        return generation
+
+    def _dispatch(self):
+        while True:
+            batch = [self.requests.get()]
+            # Give concurrent workers a moment to add their requests to the same batch
+            deadline = time.time() + self.batch_window
+            while (remaining := deadline - time.time()) > 0:
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            log_info_emoji("🧠 ", f"Dispatching {len(batch)} heal request(s) to {self.model}")
+            for key, request, generation in batch:
+                self.executor.submit(self._generate, key, request, generation)
+
+    def _generate(self, key, request, generation):
+        import ollama
+
+        try:
+            self.model_used = True
+            stream = request.get("stream", True)
+            response = ollama.generate(
+                model=self.model,
+                prompt=request["prompt"],
+                images=request.get("images") or None,
+                system=request.get("system"),
+                options=request.get("options"),
+                stream=stream,
+                keep_alive=self.keep_alive,
+            )
+            if not stream:
+                generation.add(response.response)
+            else:
+                chunks = ollama_text_chunks(response)
+                try:
+                    for chunk in chunks:
+                        generation.add(chunk)
+                        # Every waiting worker has found a valid selector and hung up: stop the model
+                        if generation.abandoned:
+                            break
+                finally:
+                    chunks.close()
+            generation.finish()
+        except Exception as e:
+            generation.finish(str(e))
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    def stop_model(self):
+        if not self.model_used:
+            return
+        import ollama
+
+        res = ollama.generate(model=self.model, stream=False, keep_alive=0)
+        if str(res.done_reason) == "unload":
+            log_info_emoji("🧠 ", f"AI Model Stopped| {self.model}...")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        if request.get("command") == "shutdown":
+            self.server.service.stop_model()
+            self._reply({"ok": True})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        generation = self.server.service.submit(request)
+        try:
+            for chunk in generation.follow():
+                self._reply({"chunk": chunk})
+            self._reply({"error": generation.error} if generation.error else {"done": True})
+        except OSError:
+            # The worker has its selector and closed the connection
+            pass
+        finally:
+            generation.leave()
+
+    def _reply(self, payload):
+        self.wfile.write((json.dumps(payload) + "\n").encode("utf-8"))
+
+
+def serve(socket_path, model, keep_alive, parallel, batch_window, ready):
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    with socketserver.ThreadingUnixStreamServer(socket_path, _RequestHandler) as server:
+        server.daemon_threads = True
+        server.service = HealingService(model, keep_alive, parallel, batch_window)
+        ready.set()
+        server.serve_forever()
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+
+class HealingServiceClient:
+
+    def __init__(self, socket_path, timeout=600):
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _send(self, payload):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+            with sock.makefile("rb") as reply:
+                return json.loads(reply.readline())
+
+    def _stream(self, payload):
+        """Text chunks of the answer; closing the generator hangs up, which lets the service stop the model."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+            with sock.makefile("rb") as reply:
+                for line in reply:
+                    message = json.loads(line)
+                    if "error" in message:
+                        raise RuntimeError(f"Healing service error: {message['error']}")
+                    if message.get("done"):
+                        return
+                    yield message["chunk"]
+        raise RuntimeError("Healing service closed the connection before the answer was complete")
+
+    def generate(self, key, prompt, images=None, system=None, options=None, stream=True, validate=None):
+        """Returns (response text, selector object or None), like SelectorHealer._query_ai."""
+        chunks = self._stream({"key": key, "prompt": prompt, "images": images or [], "system": system,
+                               "options": options, "stream": stream})
+        if not stream:
+            return "".join(chunks), None
+        return read_until_selector(chunks, validate=validate)
+
+    def shutdown(self):
+        return self._send({"command": "shutdown"})
+
+
+def start_healing_service(model, keep_alive="30m", parallel=2, batch_window=0.05):
+    """Start the service in its own process and export its socket path to worker processes."""
+    socket_path = os.path.join(tempfile.gettempdir(), f"ai-healing-{os.getpid()}.sock")
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(
+        target=serve, args=(socket_path, model, keep_alive, parallel, batch_window, ready), daemon=True
+    )
+    process.start()
+    if not ready.wait(timeout=30):
+        log_error("AI healing service did not start, workers will query the model directly")
+        process.terminate()
+        return None
+    os.environ[SOCKET_ENV] = socket_path
+    log_info_emoji("🧠 ", f"AI healing service listening on {socket_path}")
+    return process
+
+
+def stop_healing_service(process):
+    socket_path = os.environ.pop(SOCKET_ENV, None)
+    if process is None:
+        return
+    try:
+        if socket_path:
+            HealingServiceClient(socket_path, timeout=60).shutdown()
+        process.join(timeout=10)
+    except Exception as e:
+        log_error(f"Could not stop AI healing service cleanly: {e}")
+    if process.is_alive():
+        process.terminate()
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+from ai.dom_context import parse_selector, rank_candidates, CSS_CLASS_NAME
+
+
+def css_attribute_selector(tag: str, attributes: dict) -> str:
+    selector = tag or ""
+    attributes = dict(attributes)
+    # Classes as `.a.b`, which matches regardless of order and of other classes on the element
+    for name in str(attributes.pop("class", "")).split():
+        if CSS_CLASS_NAME.match(name):
+            selector += f".{name}"
+    for name, value in attributes.items():
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        selector += f'[{name}="{escaped}"]'
+    return selector
+
+
+def candidate_selector(candidate: dict, target: dict):
+    """
+    Build a selector for `candidate` in the same shape as the failed one, e.g. `input[name="custnames"]`
+    heals to `input[name="custname"]`. Returns (selector, selector_type).
+    """
+    # Attributes the original selector constrained on, as they are on the candidate
+    attributes = {name: candidate[name] for name in target["attributes"] if candidate.get(name)}
+    if attributes:
+        return css_attribute_selector(candidate["tag"], attributes), "css"
+    if target["text"] and candidate.get("text") and '"' not in candidate["text"]:
+        return f'//{candidate["tag"]}[normalize-space()="{candidate["text"]}"]', "xpath"
+    for name in ("id", "data-testid", "name"):
+        if candidate.get(name):
+            return css_attribute_selector(candidate["tag"], {name: candidate[name]}), "css"
+    return candidate["xpath"], "xpath"
+
+
+def heal_locally(page: Page, original_selector: str, candidates: list, min_score: float = 0.85,
+                 min_margin: float = 0.1):
+    """
+    Deterministic healing for near-miss selectors: rank same-tag elements by similarity to the failed
+    selector and accept the best one only if it is confident, clearly ahead of the runner-up and unique
+    on the page. Returns (selector, selector_type, score) or None to fall back to the model.
+    """
+    target = parse_selector(original_selector)
+    if not target["attributes"] and not target["text"]:
+        return None
+
+    if target["tag"]:
+        candidates = [candidate for candidate in candidates if candidate.get("tag") == target["tag"]]
+    ranked = rank_candidates(candidates, original_selector, limit=2)
+    if not ranked:
+        return None
+
+    best = ranked[0]
+    runner_up = ranked[1]["score"] if len(ranked) > 1 else 0.0
+    if best["score"] < min_score or best["score"] - runner_up < min_margin:
+        return None
+
+    selector, selector_type = candidate_selector(best, target)
+    query = f"xpath={selector}" if selector_type == "xpath" else selector
+    try:
+        if len(page.query_selector_all(query)) != 1:
+            return None
+    except Exception:
+        return None
+    return selector, selector_type, best["score"]
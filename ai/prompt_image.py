@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+from utils.logger import log_warning
+
+# Bounding box of the closest block around an element (its form, fieldset, section...), padded a little
+CONTAINER_BOX_JS = """
+(el) => {
+    const container = el.closest('form, fieldset, section, article, main, [role=dialog], [role=form]') || el.parentElement || el;
+    const rect = container.getBoundingClientRect();
+    const pad = 16;
+    return {
+        x: Math.max(rect.left + window.scrollX - pad, 0),
+        y: Math.max(rect.top + window.scrollY - pad, 0),
+        width: rect.width + 2 * pad,
+        height: rect.height + 2 * pad
+    };
+}
+"""
+
+
+def _container_clip(page: Page, anchor_xpath: str):
+    try:
+        box = page.locator(f"xpath={anchor_xpath}").first.evaluate(CONTAINER_BOX_JS)
+    except Exception:
+        return None
+    return box if box["width"] > 0 and box["height"] > 0 else None
+
+
+def _downscale(image: bytes, image_format: str, quality: int, max_width: int) -> bytes:
+    try:
+        from PIL import Image
+    except ImportError:
+        # Pillow is optional: without it the image is only reduced to CSS pixels by Playwright
+        return image
+
+    picture = Image.open(io.BytesIO(image))
+    if picture.width <= max_width:
+        return image
+    height = round(picture.height * max_width / picture.width)
+    picture = picture.resize((max_width, height))
+    output = io.BytesIO()
+    if image_format == "jpeg":
+        picture.convert("RGB").save(output, format="JPEG", quality=quality)
+    else:
+        picture.save(output, format="PNG")
+    return output.getvalue()
+
+
+def capture_prompt_image(page: Page, mode="element", image_format="jpeg", quality=70, max_width=1024,
+                         anchor_xpath=None):
+    """
+    Screenshot for the healing prompt, kept in memory.
+
+    mode: full (whole page), viewport, element (the container around `anchor_xpath`, viewport if unknown)
+    or none. Returns image bytes or None.
+    """
+    if mode == "none":
+        return None
+
+    options = {"type": image_format, "scale": "css"}
+    if image_format == "jpeg":
+        options["quality"] = quality
+
+    if mode == "full":
+        options["full_page"] = True
+    elif mode == "element" and anchor_xpath:
+        clip = _container_clip(page, anchor_xpath)
+        if clip:
+            options["clip"] = clip
+            options["full_page"] = True
+
+    try:
+        image = page.screenshot(**options)
+    except Exception as e:
+        log_warning(f"Could not capture screenshot for AI healing: {e}")
+        return None
+    return _downscale(image, image_format, quality, max_width) if max_width else image
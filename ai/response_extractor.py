@@ -0,0 +1,95 @@
+import re
+import json
+from typing import NamedTuple, Optional
+
+from utils.logger import log_error
+
+
+class HealingSuggestion(NamedTuple):
+    """What the model proposed. Unpacks like the old (selector, confidence, selector_type, identifier) tuple."""
+    selector: Optional[str] = None
+    confidence: Optional[str] = None
+    selector_type: Optional[str] = None
+    selector_identifier: Optional[str] = None
+
+
+# The answer the prompt asks for: a flat JSON object with a selector, fenced or not
+JSON_OBJECT = re.compile(r'\{[^{}]*"selector"[^{}]*\}')
+
+# Free-text answers are tokenized in one pass: every alternative is a token kind, named by the group that
+# matched. Within a field the order of the tuples below is the priority, e.g. `Selector:` beats a bare //xpath.
+TOKEN_PATTERN = re.compile(
+    r'(?i:selector\s+type:\s*(?P<type_label>[^\n]+))'
+    r'|(?i:selector:\s*`(?P<selector_backtick>[^`]+)`)'
+    r'|(?i:selector:[ \t]*(?P<selector_label>[^\s`][^\n]*))'
+    r'|(?i:confidence:\s*(?P<confidence_label>\d+%?))'
+    r'|(?i:type:\s*(?P<type_short>[^\n]+))'
+    r'|```(?!json)(?i:(?P<fence_type>css|xpath|text)\b)?\s*(?P<selector_fence>[^`]+)```'
+    r'|(?P<selector_text>(?i:text)="[^"]+")'
+    r'|(?P<selector_xpath>//[^\n]+)'
+    r'|(?P<confidence_percent>\d+)%',
+)
+
+SELECTOR_TOKENS = ("selector_backtick", "selector_label", "selector_text", "selector_fence", "selector_xpath")
+CONFIDENCE_TOKENS = ("confidence_label", "confidence_percent")
+TYPE_TOKENS = ("type_label", "type_short", "fence_type")
+
+
+def detect_selector_type(selector: str) -> str:
+    if selector.startswith('//') or selector.startswith('./') or selector.startswith('xpath='):
+        return 'xpath'
+    if 'text=' in selector:
+        return 'text'
+    if any(c in selector for c in ['.', '#', '[', ':', '>']):
+        return 'css'
+    return 'unknown'
+
+
+def suggestion_from_json(json_data: dict) -> HealingSuggestion:
+    selector = json_data.get("selector")
+    selector_type = json_data.get("selector_type")
+    identifier = json_data.get("selector_identifier")
+    if selector_type:
+        selector_type = str(selector_type).lower()
+    elif selector:
+        selector_type = detect_selector_type(selector)
+    return HealingSuggestion(
+        selector=selector,
+        confidence=json_data.get("confidence"),
+        selector_type=selector_type,
+        selector_identifier=str(identifier).lower() if identifier else None,
+    )
+
+
+def extract_suggestion(ai_response: str) -> HealingSuggestion:
+    """Parse a model answer: the first JSON object with a selector, else labelled or fenced text."""
+    ai_response = ai_response or ""
+    try:
+        for match in JSON_OBJECT.finditer(ai_response):
+            try:
+                return suggestion_from_json(json.loads(match.group(0)))
+            except ValueError:
+                continue
+
+        found = {}
+        for match in TOKEN_PATTERN.finditer(ai_response):
+            kind = match.lastgroup
+            found.setdefault(kind, match.group(kind))
+            if kind == "selector_fence" and match.group("fence_type"):
+                found.setdefault("fence_type", match.group("fence_type"))
+
+        selector = next((found[kind].strip() for kind in SELECTOR_TOKENS if kind in found), None)
+
+        confidence = next((found[kind] for kind in CONFIDENCE_TOKENS if kind in found), None)
+        if confidence and not confidence.endswith('%'):
+            confidence = f"{confidence}%"
+
+        selector_type = next((found[kind].strip().lower() for kind in TYPE_TOKENS if kind in found), None)
+        if not selector_type and selector:
+            selector_type = detect_selector_type(selector)
+
+        return HealingSuggestion(selector, confidence, selector_type)
+
+    except Exception as e:
+        log_error(f"Error extracting selector info: {e}")
+        return HealingSuggestion()
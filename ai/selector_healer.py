@@ -1,71 +1,130 @@
+from __future__ import annotations
+
 import os
 import json
-import re
-
-import ollama
+import base64
+import hashlib
 
 from datetime import datetime
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
 
 from behave.runner import Context
-from playwright.sync_api import Page
-
+# Only for type hints, so browserless runs never load playwright.sync_api
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+from ai.dom_context import extract_candidates, rank_candidates, prune_html
+from ai.healing_service import SOCKET_ENV, HealingServiceClient
+from ai.heuristic_healer import heal_locally
+from ai.prompt_image import capture_prompt_image
+from ai.response_extractor import extract_suggestion, suggestion_from_json
+from ai.streaming import read_until_selector, ollama_text_chunks
+from ai.selector_store import JsonlLog, JsonlMap, SELECTOR_MAP_FILE, SELECTOR_CACHE_FILE, SELECTOR_LOG_FILE
 from helpers.constants.framework_constants import SCREENSHOTS_DIR
 from utils.logger import log_info_emoji, log_error
 from utils.misc import load_config
+from utils.profiling import phase
 
 
 class AISelectorHealer:
 
     def __init__(self):
-        self.model = load_config()['ai_model']
-        self.selector_map_file = "selector_map.json"
-        self.log_file = "selector_log.json"
-        self._load_selector_map()
-
-    def _load_selector_map(self):
-        if os.path.exists(self.selector_map_file):
-            with open(self.selector_map_file, "r") as f:
-                self.selector_map = json.load(f)
-        else:
-            self.selector_map = {}
-
-    def _save_selector_map(self):
-        with open(self.selector_map_file, "w") as f:
-            json.dump(self.selector_map, f, indent=2)
+        config = load_config()
+        self.model = config['ai_model']
+        self.healing_config = config.get('ai_healing') or {}
+        # Append-only stores shared by all parallel workers (the old .json files are migrated once)
+        self.selector_store = JsonlMap(SELECTOR_MAP_FILE, legacy_path="selector_map.json")
+        self.heal_cache = JsonlMap(SELECTOR_CACHE_FILE, legacy_path="selector_cache.json")
+        self.heal_log = JsonlLog(SELECTOR_LOG_FILE, legacy_path="selector_log.json")
+
+    @property
+    def selector_map(self):
+        return self.selector_store.data
+
+    @staticmethod
+    def _cache_key(original_selector: str, page_url: str) -> str:
+        # Query strings and fragments rarely change the DOM the selector lives in
+        url = urlsplit(page_url)
+        return f"{original_selector}|{url.netloc}{url.path}"
+
+    def _cached_selector(self, page: Page, original_selector: str):
+        """Return a previously healed selector for this page if it still matches, dropping it otherwise."""
+        key = self._cache_key(original_selector, page.url)
+        # Pick up selectors healed by other workers since we last looked
+        entry = self.heal_cache.refresh().get(key)
+        if not entry:
+            return None
+
+        if validate_selector(page, entry["selector"], entry["selector_type"]):
+            log_info_emoji("⚡ ", f"Using cached healed selector: {entry['selector']}")
+            return entry["selector"]
+
+        log_info_emoji("♻️ ", f"Cached healed selector no longer matches, invalidating: {entry['selector']}")
+        self.heal_cache.delete(key)
+        return None
+
+    def _cache_selector(self, page: Page, original_selector: str, selector: str, selector_type: str):
+        self.heal_cache.set(self._cache_key(original_selector, page.url), {
+            "selector": selector,
+            "selector_type": selector_type,
+            "healed_at": datetime.utcnow().isoformat()
+        })
 
     def _log_result(self, entry: dict):
-        existing = []
-        if os.path.exists(self.log_file):
-            with open(self.log_file, "r") as f:
-                try:
-                    existing = json.load(f)
-                except:
-                    existing = []
-
-        existing.append(entry)
-        with open(self.log_file, "w") as f:
-            json.dump(existing, f, indent=2)
+        self.heal_log.append(entry)
 
     def update_selector(self, selector_identifier, new_selector):
-        self.selector_map[selector_identifier] = new_selector
-        self._save_selector_map()
+        self.selector_store.set(selector_identifier, new_selector)
+
+    @phase("ai_model_query")
+    def _query_ai(self, prompt, image=None, key=None, validate=None):
+        """Returns (response text, selector JSON object if one was found while streaming)."""
+        system = "You are an expert Quality Assurance Engineer automation expert."
+        options = {
+            'temperature': 0.1,  # More focused responses
+        }
 
-    def _query_ai(self, prompt, screenshot_path):
-        response = ollama.generate(
+        stream = self.healing_config.get('stream', True)
+
+        # Parallel runs share one healing service that deduplicates and batches requests across workers
+        socket_path = os.getenv(SOCKET_ENV)
+        if socket_path:
+            images = [base64.b64encode(image).decode("ascii")] if image else []
+            return HealingServiceClient(socket_path).generate(
+                key=key or hashlib.sha1(prompt.encode("utf-8")).hexdigest(),
+                prompt=prompt, images=images, system=system, options=options, stream=stream, validate=validate
+            )
+
+        # Imported on the first heal only: most runs never need the model client
+        import ollama
+
+        if not stream:
+            response = ollama.generate(
+                model=self.model,
+                prompt=prompt,
+                images=[image] if image else None,
+                stream=False,
+                system=system,
+                options=options
+            )
+            return response.response, None
+
+        # Stop generating as soon as a complete (and valid) selector object has arrived
+        stream = ollama.generate(
             model=self.model,
             prompt=prompt,
-            images=[screenshot_path],
-            stream=False,
+            images=[image] if image else None,
+            stream=True,
             # keep_alive=0,
-            system="You are an expert Quality Assurance Engineer automation expert.",
-            options={
-                'temperature': 0.1,  # More focused responses
-            }
+            system=system,
+            options=options
         )
-
-        return response.response
+        return read_until_selector(ollama_text_chunks(stream), validate=validate)
 
     def stop_model(self):
+        import ollama
+
         res = ollama.generate(
             model=self.model,
             stream=False,
@@ -74,29 +133,105 @@ class AISelectorHealer:
         if str(res.done_reason) == "unload":
             log_info_emoji("🧠 ", f"AI Model Stopped| {self.model}...")
 
+    def _extract_candidates(self, page: Page) -> list:
+        try:
+            return extract_candidates(page)
+        except Exception as e:
+            log_error(f"Could not extract page elements: {e}")
+            return []
+
+    def _page_context(self, page: Page, ranked: list, total: int) -> str:
+        """Describe the page for the prompt: top ranked interactive elements, or pruned HTML as a fallback."""
+        max_candidates = int(self.healing_config.get('max_candidates', 15))
+        if ranked:
+            top = ranked[:max_candidates]
+            return (f"Visible interactive elements of the page ({len(top)} of {total}, "
+                    f"ranked by similarity to the original selector, best first, JSON): {json.dumps(top)}")
+        return f"The HTML of the page (scripts, styles and <head> removed): {prune_html(page.content())}"
+
+    def _prompt_image(self, context: Context, ranked: list):
+        """In-memory screenshot for the prompt, or None when the DOM alone is enough."""
+        mode = self.healing_config.get('image_mode', 'auto')
+        top = ranked[0] if ranked else None
+        if mode == 'auto':
+            dom_only_min_score = float(self.healing_config.get('dom_only_min_score', 0.7))
+            if top and top["score"] >= dom_only_min_score:
+                log_info_emoji("🧠 ", "Page elements are conclusive, sending no screenshot to the model")
+                return None
+            mode = 'element'
+
+        image_format = self.healing_config.get('image_format', 'jpeg')
+        image = capture_prompt_image(
+            context.page, mode=mode, image_format=image_format,
+            quality=int(self.healing_config.get('image_quality', 70)),
+            max_width=int(self.healing_config.get('image_max_width', 1024)),
+            anchor_xpath=top["xpath"] if top else None
+        )
+        if image and self.healing_config.get('save_screenshots', False):
+            extension = "jpg" if image_format == "jpeg" else "png"
+            with open(f"{SCREENSHOTS_DIR}/ai-{str(context.bdd_step).replace(' ', '_')}.{extension}", "wb") as f:
+                f.write(image)
+        return image
+
+    def _heal_locally(self, context: Context, exception: str, original_selector: str, candidates: list):
+        """Try the deterministic healer; returns the healed selector or None when the model is needed."""
+        local_match = heal_locally(
+            context.page, original_selector, candidates,
+            min_score=float(self.healing_config.get('local_min_score', 0.85)),
+            min_margin=float(self.healing_config.get('local_min_margin', 0.1))
+        )
+        if not local_match:
+            return None
+
+        selector, selector_type, score = local_match
+        confidence = f"{round(score * 100)}%"
+        log_info_emoji("✅ ", f"Selector healed locally without AI ({confidence}): {selector}")
+        self._cache_selector(context.page, original_selector, selector, selector_type)
+        self._log_result({
+            "timestamp": datetime.utcnow().isoformat(),
+            "exception": exception,
+            "suggested_selector_identifier": original_selector,
+            "suggested_selector": selector,
+            "confidence": confidence,
+            "selector_type": selector_type,
+            "healer": "heuristic",
+            "valid": True
+        })
+        return selector
+
+    @phase("ai_heal")
     def heal_selector(self, context: Context, exception: str, original_selector: str = "") -> str:
 
-        # if original_selector in self.selector_map:
-        #     return self.selector_map[original_selector]
+        if original_selector:
+            cached_selector = self._cached_selector(context.page, original_selector)
+            if cached_selector:
+                return cached_selector
+
+        candidates = self._extract_candidates(context.page)
+        if original_selector and candidates:
+            local_selector = self._heal_locally(context, exception, original_selector, candidates)
+            if local_selector:
+                return local_selector
 
-        screenshot_path = f"{SCREENSHOTS_DIR}/ai-{str(context.bdd_step).replace(' ', '_')}.png"
-        context.page.screenshot(path=screenshot_path)
-        html_snippet = context.page.content()[:8000]
+        ranked = rank_candidates(candidates, original_selector) if candidates else []
+        image = self._prompt_image(context, ranked)
+        page_context = self._page_context(context.page, ranked, len(candidates))
+        screenshot_line = "A screenshot of the relevant part of the webpage" if image else "No screenshot, rely on the page elements"
 
         prompt = f"""
             You’re helping debug a failed Playwright web automation test. Here's what you have:
 
-                - The full HTML source of the page: {html_snippet}
-                - A screenshot of the webpage
+                - {page_context}
+                - {screenshot_line}
                 - The Playwright exception: {exception}
                 - The BDD step that failed: {context.bdd_step}
                 - The original selector used (may be empty): {original_selector}
-                - Previously healed selectors (JSON): {json.dumps(self.selector_map, indent=4)}
+                - Previously healed selectors (JSON): {json.dumps(self.selector_store.refresh(), indent=4)}
                 
                 Your job is to figure out what went wrong and fix it.
                 
                 Tasks:
-                    1. Inspect the HTML and screenshot to find the correct element the test is trying to interact with.
+                    1. Inspect the page elements and screenshot to find the correct element the test is trying to interact with.
                     2. If the element has a unique attribute like id, data-testid, or similar, use that.
                     3. If not, write a reliable XPath for it.
                     4. Estimate your confidence level in the new selector (as a percentage).
@@ -116,10 +251,17 @@ class AISelectorHealer:
         """
 
         log_info_emoji("🧠 ", f"Querying AI Model | {self.model}...")
-        ai_response = self._query_ai(prompt, screenshot_path)
+        heal_key = self._cache_key(original_selector, context.page.url) if original_selector else None
+        ai_response, suggestion = self._query_ai(
+            prompt, image, key=heal_key,
+            validate=lambda candidate: validate_selector(
+                context.page, candidate["selector"], str(candidate.get("selector_type")).lower()
+            )
+        )
         log_info_emoji("🤖 ", f"AI Response:\n{ai_response}")
 
-        suggested_selector, confidence, selector_type, selector_identifier = extract_selector_and_confidence(ai_response)
+        suggestion = suggestion_from_json(suggestion) if suggestion else extract_suggestion(ai_response)
+        suggested_selector, confidence, selector_type, selector_identifier = suggestion
 
         log_entry = {
             "timestamp": datetime.utcnow().isoformat(),
@@ -137,7 +279,9 @@ class AISelectorHealer:
 
             if is_valid:
                 log_info_emoji("✅ ", f"Selector validated with confidence {confidence}%")
-                self.update_selector(selector_identifier, suggested_selector)
+                self.update_selector(selector_identifier or original_selector, suggested_selector)
+                if original_selector:
+                    self._cache_selector(context.page, original_selector, suggested_selector, selector_type)
                 self._log_result(log_entry)
                 return suggested_selector
             else:
@@ -147,84 +291,10 @@ class AISelectorHealer:
         return suggested_selector
 
 
-def extract_selector_and_confidence(ai_response):
-    try:
-        # Try to parse JSON block first
-        json_match = re.search(r'```json\s*({.*?})\s*```', ai_response, re.DOTALL)
-        if json_match:
-            json_data = json.loads(json_match.group(1))
-            selector = json_data.get("selector")
-            confidence = json_data.get("confidence")
-            selector_type = str(json_data.get("selector_type")).lower()
-            selector_identifier = str(json_data.get("selector_identifier")).lower()
-            return selector, confidence, selector_type, selector_identifier
-
-        # Fallback regex patterns
-        selector_patterns = [
-            r'Selector:\s*`([^`]+)`',
-            r'Selector:\s*([^\n]+)',
-            r'text="([^"]+)"',
-            r'```(?:css|xpath|text)?\s*([^`]+)```',
-            r'//[^\n]+',
-            r'h2:-soup-contains\("([^"]+)"\)',
-        ]
-
-        confidence_patterns = [
-            r'Confidence:\s*(\d+%)',
-            r'Confidence:\s*(\d+)',
-            r'(\d+)%'
-        ]
-
-        selector_type_patterns = [
-            r'Selector Type:\s*([^\n]+)',
-            r'Type:\s*([^\n]+)',
-            r'```(css|xpath|text)',
-        ]
-
-        selector = None
-        confidence = None
-        selector_type = None
-
-        for pattern in selector_patterns:
-            match = re.search(pattern, ai_response, re.IGNORECASE)
-            if match:
-                selector = match.group(1).strip()
-                break
-
-        for pattern in confidence_patterns:
-            match = re.search(pattern, ai_response)
-            if match:
-                conf_value = match.group(1)
-                confidence = conf_value if conf_value.endswith('%') else f"{conf_value}%"
-                break
-
-        for pattern in selector_type_patterns:
-            match = re.search(pattern, ai_response, re.IGNORECASE)
-            if match:
-                selector_type = match.group(1).strip().lower()
-                break
-
-        # Auto-detect a selector type if still unknown
-        if not selector_type and selector:
-            if selector.startswith('//') or selector.startswith('./'):
-                selector_type = 'xpath'
-            elif 'text=' in selector or selector.startswith('text="'):
-                selector_type = 'text'
-            elif any(c in selector for c in ['.', '#', '[', ':', '>']):
-                selector_type = 'css'
-            else:
-                selector_type = 'unknown'
-
-        return selector, confidence, selector_type
-
-    except Exception as e:
-        log_error(f"Error extracting selector info: {e}")
-        return None, None, None
-
 def validate_selector(page: Page, selector: str, selector_type: str) -> bool:
     try:
-        if selector_type == "xpath":
-            return len(page.query_selector_all(f'xpath={selector}')) > 0
-        return False
+        if selector_type == "xpath" and not selector.startswith("xpath="):
+            selector = f"xpath={selector}"
+        return len(page.query_selector_all(selector)) > 0
     except Exception:
         return False
\ No newline at end of file
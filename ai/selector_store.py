@@ -0,0 +1,200 @@
+"""
+Append-only JSON Lines storage for the selector healer, safe for concurrent writers (parallel workers).
+
+Every write appends one line under an exclusive lock, so updates are O(1) and never lost.
+Key/value stores are replayed last-write-wins on load; `compact` rewrites them down to their current state:
+
+    python -m ai.selector_store compact [--keep-log 1000]
+"""
+import os
+import sys
+import json
+import argparse
+from contextlib import contextmanager
+
+from utils.logger import log_info_emoji, log_warning
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+SELECTOR_MAP_FILE = "selector_map.jsonl"
+SELECTOR_CACHE_FILE = "selector_cache.jsonl"
+SELECTOR_LOG_FILE = "selector_log.jsonl"
+
+
+@contextmanager
+def file_lock(path, exclusive=True):
+    """Advisory lock on a sidecar `.lock` file, so compaction can atomically replace the data file."""
+    with open(f"{path}.lock", "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class JsonlLog:
+    """Append-only list of JSON records."""
+
+    def __init__(self, path, legacy_path=None):
+        self.path = path
+        if legacy_path:
+            self._migrate(legacy_path)
+
+    def _migrate(self, legacy_path):
+        # One-off import of the old whole-file JSON format. Checked and written under one lock, so a second
+        # worker starting at the same time sees the migrated file instead of overwriting later appends.
+        if not os.path.exists(legacy_path):
+            return
+        with file_lock(self.path):
+            if os.path.exists(self.path):
+                return
+            try:
+                with open(legacy_path, "r") as f:
+                    records = json.load(f)
+            except ValueError:
+                log_warning(f"Could not migrate {legacy_path}, starting a new {self.path}")
+                return
+            if isinstance(records, dict):
+                records = [{"key": key, "value": value} for key, value in records.items()]
+            self._rewrite(records)
+        log_info_emoji("📦", f"Migrated {legacy_path} to {self.path}")
+
+    def append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with file_lock(self.path):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+
+    def read(self, offset=0):
+        """Return (records, end_offset) for everything written after `offset` bytes."""
+        if not os.path.exists(self.path):
+            return [], 0
+        with file_lock(self.path, exclusive=False):
+            return self._read(offset)
+
+    def _read(self, offset=0):
+        if not os.path.exists(self.path):
+            return [], 0
+        with open(self.path, "rb") as f:
+            if offset > os.fstat(f.fileno()).st_size:
+                # File was compacted since we last read it: start over
+                offset = 0
+            f.seek(offset)
+            data = f.read()
+        # Only consume complete lines, a concurrent writer may be mid-append
+        end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records, offset + end
+
+    def rewrite(self, records):
+        with file_lock(self.path):
+            self._rewrite(records)
+
+    def _rewrite(self, records):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def compact(self, keep=None):
+        with file_lock(self.path):
+            records, _ = self._read()
+            if keep is not None:
+                records = records[-keep:] if keep else []
+            self._rewrite(records)
+        return len(records)
+
+
+class JsonlMap(JsonlLog):
+    """Key/value store on top of JsonlLog: `set`/`delete` append a line, `refresh` replays new lines."""
+
+    def __init__(self, path, legacy_path=None):
+        super().__init__(path, legacy_path)
+        self.data = {}
+        self._offset = 0
+        self._inode = None
+        self.refresh()
+
+    def _current_inode(self):
+        return os.stat(self.path).st_ino if os.path.exists(self.path) else None
+
+    def refresh(self):
+        inode = self._current_inode()
+        if inode != self._inode:
+            # New file or compacted by another process: the file holds the full state again
+            self.data = {}
+            self._offset = 0
+            self._inode = inode
+        records, self._offset = self.read(self._offset)
+        self._apply(records)
+        return self.data
+
+    def _apply(self, records):
+        for record in records:
+            if record.get("deleted"):
+                self.data.pop(record.get("key"), None)
+            else:
+                self.data[record.get("key")] = record.get("value")
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.append({"key": key, "value": value})
+
+    def delete(self, key):
+        self.data.pop(key, None)
+        self.append({"key": key, "deleted": True})
+
+    def compact(self, keep=None):
+        with file_lock(self.path):
+            records, _ = self._read()
+            self.data = {}
+            self._apply(records)
+            self._rewrite([{"key": key, "value": value} for key, value in self.data.items()])
+            self._offset = os.path.getsize(self.path)
+            self._inode = self._current_inode()
+        return len(self.data)
+
+
+def compact_all(keep_log=None):
+    for store in (JsonlMap(SELECTOR_MAP_FILE), JsonlMap(SELECTOR_CACHE_FILE)):
+        log_info_emoji("🧹", f"Compacted {store.path} to {store.compact()} entries")
+    log_info_emoji("🧹", f"Compacted {SELECTOR_LOG_FILE} to {JsonlLog(SELECTOR_LOG_FILE).compact(keep_log)} entries")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the AI selector healing stores")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    compact_parser = subparsers.add_parser("compact", help="Rewrite the stores down to their current state")
+    compact_parser.add_argument("--keep-log", type=int, help="Only keep the newest N heal log entries")
+    args = parser.parse_args(argv)
+
+    if args.command == "compact":
+        compact_all(args.keep_log)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import json
+
+
+class IncrementalJsonParser:
+    """
+    Finds top-level JSON objects in streamed model output as soon as their closing brace arrives.
+    Every character is scanned once, however the text is split into chunks.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._position = 0
+        self._depth = 0
+        self._start = None
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        objects = []
+        for index in range(self._position, len(self.text)):
+            char = self.text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"' and self._depth:
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._start = index
+                self._depth += 1
+            elif char == "}" and self._depth:
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        parsed = json.loads(self.text[self._start:index + 1])
+                    except ValueError:
+                        parsed = None
+                    if isinstance(parsed, dict):
+                        objects.append(parsed)
+                    self._start = None
+        self._position = len(self.text)
+        return objects
+
+
+def read_until_selector(chunks, validate=None):
+    """
+    Consume streamed text chunks until a JSON object with a "selector" arrives (and passes `validate`, if
+    given), then close the stream so the model stops generating.
+    Returns (text received so far, selector object or None).
+    """
+    parser = IncrementalJsonParser()
+    suggestion = None
+    try:
+        for chunk in chunks:
+            for candidate in parser.feed(chunk):
+                if not candidate.get("selector"):
+                    continue
+                suggestion = candidate
+                # An invalid selector is kept, but the model may still correct itself further on
+                if validate is None or validate(candidate):
+                    return parser.text, suggestion
+    finally:
+        close = getattr(chunks, "close", None)
+        if close:
+            close()
+    return parser.text, suggestion
+
+
+def ollama_text_chunks(stream):
+    """Text pieces of an `ollama.generate(stream=True)` response, closing the HTTP stream when closed."""
+    try:
+        for part in stream:
+            yield part.response
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
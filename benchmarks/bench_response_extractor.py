@@ -0,0 +1,63 @@
+"""
+Micro-benchmark for the AI healer's response extractor.
+
+Runs `extract_suggestion` over a corpus of recorded model outputs and reports parse cost and accuracy
+together, so a faster extractor that starts missing selectors shows up immediately.
+
+    python -m benchmarks.bench_response_extractor
+    python -m benchmarks.bench_response_extractor --repeat 5000 --corpus my_responses.jsonl
+"""
+import os
+import json
+import argparse
+import statistics
+from timeit import Timer
+
+from ai.response_extractor import extract_suggestion
+
+CORPUS_FILE = os.path.join(os.path.dirname(__file__), 'healer_responses.jsonl')
+CHECKED_FIELDS = ("selector", "confidence", "selector_type")
+
+
+def load_corpus(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check(entry):
+    """Fields of the extracted suggestion that differ from the recorded expectation."""
+    suggestion = extract_suggestion(entry["response"])._asdict()
+    return [field for field in CHECKED_FIELDS if suggestion[field] != entry["expected"].get(field)]
+
+
+def time_entry(entry, repeat, rounds=5):
+    """Best-of-rounds mean time per parse, in microseconds."""
+    timer = Timer(lambda: extract_suggestion(entry["response"]))
+    return min(timer.repeat(repeat=rounds, number=repeat)) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the AI healer response extractor")
+    parser.add_argument('--corpus', default=CORPUS_FILE, help="JSON Lines file of {name, response, expected}")
+    parser.add_argument('--repeat', type=int, default=2000, help="Parses per timing round")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    timings = []
+    failures = 0
+    print(f"{'case':<30} {'chars':>6} {'µs/parse':>9}  result")
+    for entry in corpus:
+        mismatched = check(entry)
+        failures += bool(mismatched)
+        micros = time_entry(entry, args.repeat)
+        timings.append(micros)
+        result = "ok" if not mismatched else f"MISMATCH {', '.join(mismatched)}"
+        print(f"{entry['name']:<30} {len(entry['response']):>6} {micros:>9.2f}  {result}")
+
+    print(f"\nAccuracy: {len(corpus) - failures}/{len(corpus)}"
+          f" | median {statistics.median(timings):.2f} µs | max {max(timings):.2f} µs per parse")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
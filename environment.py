@@ -1,24 +1,69 @@
+import os
+import time
+
+from helpers.constants.framework_constants import PERFORMANCE_TAG
 from ai.selector_healer import AISelectorHealer
 from utils.logger import log_failure
-from utils.browser.browser import prepare_browser
+from utils.browser.browser import prepare_browser, persistent_browser_enabled, needs_browser
+from utils.http_client import HttpClient, get_http_config, shared_http_client
+from utils.performance.load import LOAD_USERS_ENV, load_mode
+from utils.profiling import phase, profiling_mode, record, record_spawn_time, write_phase_report
 from utils.reporting import attach_screenshot
 
 
 def before_all(context):
-    prepare_browser(context)
-    from pages.page_factory import PageFactory
-    context.page_factory = PageFactory()
-    context.ai = AISelectorHealer()
+    record_spawn_time()
+    with phase("before_all"):
+        prepare_browser(context)
+        # Virtual users of a load run share one client, so API scenarios scale with threads, not sockets
+        if load_mode():
+            context.http = shared_http_client(int(os.environ[LOAD_USERS_ENV]))
+        else:
+            context.http = HttpClient(**get_http_config())
+        from pages.page_factory import PageFactory
+        context.page_factory = PageFactory()
+        context.ai = AISelectorHealer()
 
 
 def after_all(context):
-    context.browser_manager.stop()
+    with phase("after_all"):
+        if not load_mode():
+            context.http.close()
+        # A persistent browser outlives this run and is shut down by the worker that owns it
+        if not persistent_browser_enabled():
+            context.browser_manager.stop()
+    write_phase_report()
+
+
+def before_scenario(context, scenario):
+    # API-only scenarios (@api, @no_browser) run without ever launching a browser
+    if needs_browser(scenario):
+        context.page = context.browser_manager.acquire_page()
+    context.performance = None
+    if PERFORMANCE_TAG in scenario.effective_tags:
+        # Imported here so only performance scenarios load the capture helpers
+        from utils.performance.capture import start_capture
+        start_capture(context, scenario)
+
+
+def after_scenario(context, scenario):
+    if context.performance:
+        from utils.performance.capture import finish_capture
+        finish_capture(context, scenario)
+    context.browser_manager.release_page()
+
 
 def before_step(context, step):
     context.bdd_step = step.name
+    if profiling_mode():
+        context.step_started = time.perf_counter()
 
 
 def after_step(context, step):
+    if profiling_mode() and hasattr(context, "step_started"):
+        elapsed = time.perf_counter() - context.step_started
+        record("step", elapsed)
+        record(f"step: {step.name}", elapsed)
     if step.status == "failed":
         log_failure(f"Step failed: {step.name}")
         if hasattr(context, "page"):
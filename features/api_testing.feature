@@ -12,6 +12,11 @@ Feature: API Testing
     When the response is received
     Then the response status should be 201
 
+  @api @pass_test
+  Scenario: Test concurrent GET requests
+    Given the user makes 10 concurrent GET requests to the API
+    Then all responses should have status 200
+
   @api @broken_test
   Scenario: Test API error handling
     Given the user makes an invalid request to the API
@@ -5,6 +5,8 @@ Feature: Performance Testing
     Given the user navigates to the homepage for performance test
     When the page finishes loading
     Then the page load time should be under 3 seconds
+    And the time to first byte should be under 1500 ms
+    And the largest contentful paint should be under 2500 ms
 
   @performance @pass_test
   Scenario: Test memory usage
@@ -16,4 +18,14 @@ Feature: Performance Testing
   Scenario: Test network requests
     Given the user navigates to the homepage for performance test
     When the page loads all resources
-    Then the number of network requests should be optimized 
\ No newline at end of file
+    Then the number of network requests should be optimized
+    And the page should make at most 30 network requests
+    And the page should transfer at most 2048 KB
+    And no network request should fail
+
+  @performance @perf(iterations=10,warmup=2) @pass_test
+  Scenario: Check page load time over repeated loads
+    Given the user navigates to the homepage for performance test
+    When the page finishes loading
+    Then the page load time should be under 3 seconds
+    And the time to first byte should be under 1500 ms
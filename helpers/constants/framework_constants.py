@@ -8,6 +8,35 @@ SCREENSHOTS_DIR = os.path.join(REPORTS, 'screenshots')
 WORKER_DIR = os.path.join(REPORTS, 'workers')
 ALLURE_RESULTS_DIR = os.path.join(REPORTS, 'allure-results')
 
+# Scenarios tagged with any of these never get a browser page
+BROWSERLESS_TAGS = {"api", "no_browser"}
+
 # Tracing
 TRACES_DIR = os.path.join(REPORTS, "traces")
-TRACES_VIDEOS_DIR = os.path.join(TRACES_DIR, "videos")
\ No newline at end of file
+TRACES_VIDEOS_DIR = os.path.join(TRACES_DIR, "videos")
+
+# Scheduling
+DURATIONS_FILE = os.path.join(REPORTS, 'durations.json')
+# Parsed feature metadata keyed on file mtime/size, so runs only re-parse changed features
+DISCOVERY_CACHE_FILE = os.path.join(REPORTS, 'discovery_cache.json')
+
+# Parallel runs: results and scenario events in flight between workers and the runner
+WORKER_EVENT_BUFFER = 1000
+
+# Static Allure HTML report, updated from ALLURE_RESULTS_DIR
+ALLURE_REPORT_DIR = os.path.join(REPORTS, 'allure-report')
+# Trend history of the runs before the current one, the input of every render during a run
+ALLURE_HISTORY_DIR = os.path.join(REPORTS, 'allure-history')
+
+# Phase timings and profiler output (run_tests.py --profile)
+PROFILING_DIR = os.path.join(REPORTS, 'profiling')
+
+# Scenarios with this tag capture network requests, page timing and Web Vitals (one JSON line each)
+PERFORMANCE_TAG = 'performance'
+PERFORMANCE_DIR = os.path.join(REPORTS, 'performance')
+PERFORMANCE_METRICS_FILE = os.path.join(PERFORMANCE_DIR, 'metrics.jsonl')
+# Metrics of every performance scenario across runs, the rolling baseline of the regression gate
+PERF_BASELINE_DB = os.path.join(REPORTS, 'perf_baseline.db')
+
+# Load mode (run_tests.py --load): throughput and latency percentiles per step
+LOAD_DIR = os.path.join(REPORTS, 'load')
@@ -1,141 +1,350 @@
 import os
 import sys
+import time
 import subprocess
+import queue
 import multiprocessing
+from contextlib import nullcontext
 from pathlib import Path
+from statistics import median
 
-from helpers.constants.framework_constants import TRACES_DIR, ALLURE_RESULTS_DIR
+from behave.runner import Runner
+
+from ai.healing_service import healing_service_available, start_healing_service, stop_healing_service
+from helpers.constants.framework_constants import (
+    TRACES_DIR, ALLURE_RESULTS_DIR, WORKER_DIR, WORKER_EVENT_BUFFER, PROFILING_DIR
+)
 from helpers.file_system import create_reports_structure
+from utils.events import EVENTS_FD_ENV, read_events, set_event_sink
+from utils.durations import DurationEstimator, order_longest_first, plan_worker_loads, record_durations
+from utils.features import matching_scenario_locations, save_discovery_cache
+from utils.misc import load_config
+from utils.performance.baseline import RUN_ID_ENV, new_run_id, summarize_regressions
+from utils.performance.iterations import ITERATIONS_ENV, WARMUP_ENV, CONTEXT_ENV
+from utils.performance.load import run_load, summarize_load
 from utils.prepration import run_options
+from utils.profiling import (
+    PROFILE_ENV, WORKER_ENV, SPAWN_TIME_ENV, phase, profiler_command, process_profiler,
+    reset_phases, clear_phase_reports, write_phase_report, summarize_phase_reports
+)
 from utils.logger import (
     log_info, log_warning, log_success, log_failure,
     log_info_emoji
 )
-from utils.reporting import combine_allure_reports, server_report
+from utils.reporting import LiveReport, advance_report_history, generate_report, open_report, server_report
 
 
-def distribute_features(feature_files, max_workers):
-    """Distribute feature files across workers."""
-    worker_tasks = [[] for _ in range(max_workers)]
-    for i, feature_file in enumerate(feature_files):
-        worker_tasks[i % max_workers].append(feature_file)
-    return worker_tasks
+def build_work_units(feature_files, granularity="feature", tags=None):
+    """
+    Split feature files into schedulable work units (a list of behave locations each), keeping only the
+    scenarios that match the tag expressions. Feature granularity keeps a file whole when every scenario
+    matches and lists just the matching `file:line` locations otherwise.
+    """
+    units = []
+    for feature_file in feature_files:
+        try:
+            locations, total = matching_scenario_locations(feature_file, tags)
+        except Exception as e:
+            log_warning(f"Could not parse {feature_file}: {e}")
+            # Fall back to running the whole file as one unit, behave reports what is wrong with it
+            units.append([str(feature_file)])
+            continue
+        if not locations:
+            continue
+        if granularity == "scenario":
+            units.extend([location] for location in locations)
+        elif len(locations) == total:
+            units.append([str(feature_file)])
+        else:
+            units.append(locations)
+    return units
+
+
+def worker_behave_args(feature_files):
+    """
+    Behave arguments for a worker: Allure results plus structured scenario events for the parent.
+    All workers write into the shared results directory, Allure names every file by UUID so nothing collides
+    and no merge step is needed afterwards. Tags are not passed: work units already list only matching scenarios.
+    """
+    args = [
+        '-f', 'allure_behave.formatter:AllureFormatter',
+        '-o', ALLURE_RESULTS_DIR,
+        '-f', 'utils.events:EventFormatter',
+        '--no-capture',
+        '--no-capture-stderr'
+    ]
+    return args + [str(f) for f in feature_files]
+
+
+def redirect_worker_output(worker_id):
+    """Send this worker's raw output (and its behave subprocesses') straight to its own log file."""
+    os.makedirs(WORKER_DIR, exist_ok=True)
+    log_file = os.path.join(WORKER_DIR, f"worker_{worker_id}.log")
+    sys.stdout.flush()
+    sys.stderr.flush()
+    with open(log_file, 'w', encoding='utf-8') as log:
+        os.dup2(log.fileno(), sys.stdout.fileno())
+        os.dup2(log.fileno(), sys.stderr.fileno())
+    return log_file
+
+
+class StepsOnceRunner(Runner):
+    """Behave runner for persistent workers: step modules are executed once per process, not once per unit."""
+    steps_loaded = False
+
+    def load_step_definitions(self, extra_step_paths=None):
+        # The step registry is module-global, definitions from the first run stay registered
+        if StepsOnceRunner.steps_loaded:
+            return
+        super().load_step_definitions(extra_step_paths)
+        StepsOnceRunner.steps_loaded = True
+
+
+def run_worker_features_in_process(feature_files, worker_id):
+    """Run behave through its runner API inside this process, reusing the already launched browser."""
+    from behave.__main__ import run_behave
+    from behave.configuration import Configuration
+
+    try:
+        args = worker_behave_args(feature_files)
+        exit_code = run_behave(Configuration(command_args=args), runner_class=StepsOnceRunner)
+        return {
+            'worker_id': worker_id,
+            'exit_code': exit_code,
+            'stderr': '',
+            'error': None if exit_code == 0 else f"Worker {worker_id} failed with exit code {exit_code}"
+        }
+    except Exception as e:
+        return {
+            'worker_id': worker_id,
+            'exit_code': 1,
+            'stderr': str(e),
+            'error': str(e)
+        }
 
 
-def run_worker_features(feature_files, report_dir, tags=None):
+def run_worker_loop(worker_id, work_queue, result_queue, persistent=False):
+    """
+    Pull work units from the shared queue until the stop sentinel (None) is received. Scenario events and
+    unit results go to the parent over `result_queue`, everything else to the worker's log file.
+    """
+    log_file = redirect_worker_output(worker_id)
+    os.environ[WORKER_ENV] = str(worker_id)
+    reset_phases()
+    startup = {}
+
+    def send_event(event):
+        # Time from handing a unit to behave until its first step runs: behave startup plus hooks
+        if event['event'] == 'scenario_started' and 'seconds' not in startup:
+            startup['seconds'] = round(time.perf_counter() - startup['unit_start'], 3)
+        result_queue.put({**event, 'worker_id': worker_id})
+
+    if persistent:
+        set_event_sink(send_event)
+        os.environ[SPAWN_TIME_ENV] = str(time.time())
+    # Subprocess workers are profiled through their behave command line instead
+    profiler = process_profiler(worker_id) if persistent else nullcontext()
     try:
-        cmd = [
-            sys.executable, '-m', 'behave',
-            '-f', 'allure_behave.formatter:AllureFormatter',
-            '-o', report_dir,
-            '--no-capture',
-            '--no-capture-stderr'
-        ]
-        if tags:
-            for tag in tags:
-                cmd.extend(['-t', tag])
-        cmd += [str(f) for f in feature_files]
-
-        # Stream output, filter empty lines
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
-        output_lines = []
-        for line in process.stdout:
-            if not line.strip():
-                continue
-            output_lines.append(line)
-            log_info(line.rstrip())
+        with profiler:
+            while True:
+                unit = work_queue.get()
+                if unit is None:
+                    break
+                startup.clear()
+                startup['unit_start'] = time.perf_counter()
+                if persistent:
+                    result = run_worker_features_in_process(unit, worker_id)
+                else:
+                    result = run_worker_features(unit, worker_id, on_event=send_event)
+                result['unit'] = unit
+                result['log_file'] = log_file
+                result['startup'] = startup.get('seconds')
+                result_queue.put(result)
+    finally:
+        if persistent:
+            from utils.browser.browser import shutdown_shared_browser
+            shutdown_shared_browser()
+            write_phase_report()
+
+
+def collect_worker_results(result_queue, workers, expected):
+    """
+    Wait for one result per work unit, giving up if every worker has exited early. Scenario events
+    arriving in between are shown as a compact live summary.
+    """
+    results = []
+    summary = ScenarioSummary()
+    while len(results) < expected:
+        try:
+            message = result_queue.get(timeout=1)
+        except queue.Empty:
+            if not any(worker.is_alive() for worker in workers):
+                log_warning(f"⚠️  Workers exited with {expected - len(results)} work units left unfinished")
+                results.append({'worker_id': None, 'exit_code': 1, 'error': 'Workers exited before finishing'})
+                break
+            continue
+        if 'event' in message:
+            summary.add(message)
+        else:
+            results.append(message)
+            summary.add_result(message)
+            if message.get('error'):
+                log_failure(f"{message['error']} (see {message.get('log_file')})")
+    summary.log_totals()
+    return results
+
+
+class ScenarioSummary:
+    """One short console line per finished scenario plus the totals at the end."""
+
+    def __init__(self):
+        self.counts = {}
+        self.cold_starts = []
+        self.warm_starts = []
+        self.seen_workers = set()
+
+    def add_result(self, result):
+        if result.get('startup') is None:
+            return
+        # The first unit of each worker pays the cold start (imports, browser launch in persistent mode)
+        if result['worker_id'] in self.seen_workers:
+            self.warm_starts.append(result['startup'])
+        else:
+            self.seen_workers.add(result['worker_id'])
+            self.cold_starts.append(result['startup'])
+
+    def add(self, event):
+        if event['event'] != 'scenario_finished':
+            return
+        status = event['status']
+        self.counts[status] = self.counts.get(status, 0) + 1
+        line = (f"[worker {event['worker_id']}] {event['feature']}: {event['name']} "
+                f"({event['duration']:.1f}s) | {sum(self.counts.values())} done")
+        if status == 'passed':
+            log_success(line)
+        elif status == 'failed':
+            log_failure(line)
+        else:
+            log_info_emoji("⏭️ ", f"{status}: {line}")
+
+    def log_totals(self):
+        totals = ", ".join(f"{count} {status}" for status, count in sorted(self.counts.items()))
+        log_info_emoji("📊", f"Scenarios: {totals or 'none reported'}")
+        if self.cold_starts:
+            warm = f", later units median {median(self.warm_starts):.2f}s" if self.warm_starts else ""
+            log_info_emoji("⏱️ ", f"Worker startup until first step: first unit median {median(self.cold_starts):.2f}s{warm}")
+
+
+def run_worker_features(feature_files, worker_id, on_event=None):
+    """Run behave in a subprocess; its output is inherited (the worker log), its events come over a pipe."""
+    try:
+        cmd = profiler_command([sys.executable, '-m', 'behave'] + worker_behave_args(feature_files), worker_id)
+
+        if os.name == 'nt':
+            # No fd inheritance for the event pipe on Windows: results only, no live scenario summary
+            process = subprocess.Popen(cmd, env={**os.environ, SPAWN_TIME_ENV: str(time.time())})
+        else:
+            read_fd, write_fd = os.pipe()
+            env = {**os.environ, EVENTS_FD_ENV: str(write_fd), SPAWN_TIME_ENV: str(time.time())}
+            try:
+                process = subprocess.Popen(cmd, env=env, pass_fds=(write_fd,))
+            finally:
+                os.close(write_fd)
+            for event in read_events(read_fd):
+                if on_event:
+                    on_event(event)
         exit_code = process.wait(timeout=600)
 
-        # Parse failing scenarios from output
-        full_output = '\n'.join(output_lines)
-
         return {
-            'worker_id': report_dir.split('_')[-1],
+            'worker_id': worker_id,
             'exit_code': exit_code,
-            'stdout': full_output,
             'stderr': '',
-            'error': None if exit_code == 0 else f"Worker {report_dir.split('_')[-1]} failed with exit code {exit_code}"
+            'error': None if exit_code == 0 else f"Worker {worker_id} failed with exit code {exit_code}"
         }
     except subprocess.TimeoutExpired:
         return {
-            'worker_id': report_dir.split('_')[-1],
+            'worker_id': worker_id,
             'exit_code': 1,
-            'stdout': '',
             'stderr': 'Test timed out after 10 minutes',
             'error': 'Test timed out after 10 minutes'
         }
     except Exception as e:
         return {
-            'worker_id': report_dir.split('_')[-1],
+            'worker_id': worker_id,
             'exit_code': 1,
-            'stdout': '',
             'stderr': str(e),
             'error': str(e)
         }
 
 
-def filter_features_by_tags(feature_files, tags):
-    if not tags:
-        return feature_files
-
-    relevant_features = []
-    for feature_file in feature_files:
-        try:
-            with open(feature_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Check if any of the tags are present in the feature file
-                for tag in tags:
-                    if tag in content:
-                        relevant_features.append(feature_file)
-                        break
-        except Exception as e:
-            log_warning(f"Could not read {feature_file}: {e}")
-            # If we can't read the file, include it to be safe
-            relevant_features.append(feature_file)
-
-    return relevant_features
-
-
-def run_behave_parallel(feature_files, max_workers=None, tags=None):
-    # Filter feature files based on tags
+def run_behave_parallel(feature_files, max_workers=None, tags=None, granularity="feature", persistent=False,
+                        healing_service_enabled=True):
+    # Only scenarios matching the tag expressions are scheduled
+    with phase("discovery"):
+        work_units = build_work_units(feature_files, granularity, tags)
+    if not work_units:
+        log_warning("⚠️  No scenarios found matching the specified tags." if tags else "⚠️  No scenarios found to run.")
+        return True
     if tags:
-        feature_files = filter_features_by_tags(feature_files, tags)
-        log_info_emoji("📁", f"Running {len(feature_files)} relevant feature files (filtered by tags: {tags})")
+        log_info_emoji("📁", f"Scheduling {len(work_units)} work units matching tags: {tags}")
 
     if max_workers is None:
-        max_workers = min(multiprocessing.cpu_count(), len(feature_files))
-
-    if len(feature_files) == 0:
-        log_warning("⚠️  No feature files found matching the specified tags.")
-        return True
-
-    # Adjust max_workers to actual number of feature files if fewer
-    actual_workers = min(max_workers, len(feature_files))
-    log_info_emoji("🚀", f"Running {len(feature_files)} feature files with {actual_workers} parallel workers")
+        max_workers = min(multiprocessing.cpu_count(), len(work_units))
+
+    # Adjust max_workers to actual number of work units if fewer
+    actual_workers = min(max_workers, len(work_units))
+
+    # Longest expected units go first so no worker is left with a long tail at the end
+    estimator = DurationEstimator()
+    work_units = order_longest_first(work_units, estimator)
+    loads = plan_worker_loads([estimator.unit(unit) for unit in work_units], actual_workers)
+    save_discovery_cache()
+    log_info_emoji("🚀", f"Running {len(work_units)} work units from {len(feature_files)} feature files "
+                         f"with {actual_workers} parallel workers")
+    log_info_emoji("⏱️ ", f"Expected wall-clock ~{loads[0]:.1f}s for {sum(loads):.1f}s of total work")
+    log_info_emoji("📁", f"Worker output is written to {WORKER_DIR}/worker_<n>.log")
     log_info("=" * 50)
 
-    # Create individual report directories for each worker
-    report_dirs = []
-    for i in range(max_workers):
-        report_dir = f"reports/workers/worker_{i}"
-        os.makedirs(report_dir, exist_ok=True)
-        report_dirs.append(report_dir)
-
-    # Create a pool of workers
-    with multiprocessing.Pool(processes=max_workers) as pool:
-        worker_tasks = distribute_features(feature_files, max_workers)
-
-        # Run behave for each worker's feature files
-        results = pool.starmap(
-            run_worker_features,
-            [(tasks, report_dirs[i], tags) for i, tasks in enumerate(worker_tasks) if tasks]
+    # One AI healing service for all workers: deduplicated, batched heals and a single model unload
+    healing_service = None
+    if healing_service_enabled and healing_service_available():
+        ai_config = load_config().get('ai_healing') or {}
+        healing_service = start_healing_service(
+            load_config()['ai_model'],
+            keep_alive=ai_config.get('service_keep_alive', '30m'),
+            parallel=int(ai_config.get('service_parallel', 2)),
+            batch_window=float(ai_config.get('service_batch_window', 0.05))
         )
 
+    # Shared work queue: each worker pulls the next unit as soon as it is free. Results and scenario
+    # events share one bounded queue, so a slow console holds workers back instead of buffering without limit
+    work_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue(maxsize=WORKER_EVENT_BUFFER)
+    for unit in work_units:
+        work_queue.put(unit)
+    for _ in range(actual_workers):
+        work_queue.put(None)
+
+    workers = [
+        multiprocessing.Process(target=run_worker_loop, args=(i, work_queue, result_queue, persistent))
+        for i in range(actual_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        with phase("workers"):
+            results = collect_worker_results(result_queue, workers, len(work_units))
+            for worker in workers:
+                worker.join()
+    finally:
+        stop_healing_service(healing_service)
+
     # Check results
     failed_tests = [result for result in results if result['exit_code'] != 0]
 
-    # Combine Allure reports
-    combine_allure_reports(report_dirs)
+    # Workers wrote straight into the shared results directory
+    log_info_emoji("📊", f"Allure results written to: {ALLURE_RESULTS_DIR}")
 
     log_info("=" * 50)
     if failed_tests:
@@ -161,7 +370,9 @@ def run_behave_command(args):
             cmd.extend(['-t', tag])
 
     # Run the command with live output streaming
-    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    cmd = profiler_command(cmd, "sequential")
+    env = {**os.environ, SPAWN_TIME_ENV: str(time.time())}
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1, env=env)
     output_lines = []
     for line in process.stdout:
         if not line.strip():
@@ -186,10 +397,38 @@ def main():
     os.environ['BROWSER'] = args.browser
     log_info_emoji("🌐", f"Browser: {str(args.browser).capitalize()}")
 
+    # Only worker loops shut the shared browser down, a sequential run must close its browser in after_all
+    if args.persistent_workers and not args.parallel:
+        log_warning("--persistent-workers only applies to --parallel runs, ignoring it")
+    elif args.persistent_workers:
+        os.environ['PERSISTENT_BROWSER'] = 'True'
+        log_info_emoji("🌐", "Persistent Workers: each worker keeps one browser open, one context per scenario")
+
+    if args.perf_iterations:
+        os.environ[ITERATIONS_ENV] = str(args.perf_iterations)
+        os.environ[WARMUP_ENV] = str(args.perf_warmup)
+        os.environ[CONTEXT_ENV] = args.perf_context
+        log_info_emoji("📐", f"Performance iterations: {args.perf_iterations} + {args.perf_warmup} warmup, "
+                            f"{args.perf_context} contexts")
+
     if args.tracing:
         log_info_emoji("�� ", f"Tracing Enabled | Trace files will be saved to {TRACES_DIR}")
 
     create_reports_structure()
+    # Workers inherit it, so every scenario of this run lands under one id in the performance baseline
+    os.environ.setdefault(RUN_ID_ENV, new_run_id())
+
+    if args.profile:
+        os.environ[PROFILE_ENV] = args.profile
+        clear_phase_reports()
+        log_info_emoji("⏱️ ", f"Profiling: {args.profile} | Output in {PROFILING_DIR}")
+
+    if args.report_only:
+        if not generate_report(force=True):
+            sys.exit(1)
+        if args.serve_report:
+            open_report()
+        return
 
     features_dir = Path("features")
     if not features_dir.exists():
@@ -207,27 +446,68 @@ def main():
         log_info_emoji("📁", f"Running specified feature files: {args.features}")
         feature_files = [Path(f) for f in args.features]
 
+    if args.load:
+        log_info_emoji("🚦", f"Load mode: {args.users} virtual users for {args.duration}s "
+                            f"over {args.load_processes} process(es), ramp-up {args.ramp_up}s")
+        stats, elapsed = run_load(args.features or [features_dir], tags=args.tags, users=args.users,
+                                  duration=args.duration, ramp_up=args.ramp_up, processes=args.load_processes)
+        summarize_load(stats, elapsed, args.users)
+        if stats.failures:
+            sys.exit(1)
+        return
+
+    # Once per run: every render of this run (live or final) builds on the trend of the previous runs
+    advance_report_history()
+    live_report = LiveReport(args.live_report).start() if args.live_report else None
+
     # Run tests
     if args.parallel:
         log_info_emoji("🔄", "Running tests in parallel mode")
         # Determine the number of workers for parallel execution
-        max_workers = args.workers if args.workers else min(multiprocessing.cpu_count(), len(feature_files))
+        if args.workers:
+            max_workers = args.workers
+        elif args.granularity == "scenario":
+            max_workers = multiprocessing.cpu_count()
+        else:
+            max_workers = min(multiprocessing.cpu_count(), len(feature_files))
         log_info_emoji("👥", f"Using {max_workers} workers")
 
-        success = run_behave_parallel(feature_files, max_workers, tags=args.tags)
+        success = run_behave_parallel(feature_files, max_workers, tags=args.tags, granularity=args.granularity,
+                                      persistent=args.persistent_workers,
+                                      healing_service_enabled=not args.no_healing_service)
         result = type('Result', (), {'returncode': 0 if success else 1})()
     else:
         log_info_emoji("🔄", "Running tests in sequential mode")
         log_info("=" * 50)
         result = run_behave_command(args)
 
+    if live_report:
+        live_report.stop()
+
+    with phase("record_durations"):
+        record_durations()
+
+    summarize_regressions(os.environ[RUN_ID_ENV])
+
     # Handle test results
     if result.returncode == 0:
         log_success("All tests passed!")
     else:
         log_failure("Some tests failed!")
 
-    server_report(args)
+    # Serving blocks until the user stops it, so the profile summary comes first in that case
+    if not args.serve_report:
+        with phase("report"):
+            server_report(args)
+
+    if args.profile:
+        os.environ[WORKER_ENV] = "runner"
+        write_phase_report()
+        summarize_phase_reports()
+
+    if args.serve_report:
+        server_report(args)
+
     if result.returncode != 0:
         sys.exit(result.returncode)
 
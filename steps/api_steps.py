@@ -1,13 +1,14 @@
 from behave import step
-import requests
+
+from utils.logger import log_error
 
 @step("the user makes a GET request to the API")
 def step_make_get_request(context):
     try:
-        response = requests.get(context.build_url(context.base_url, "get"))
+        response = context.http.get(context.build_url(context.base_url, "get"))
         context.api_response = response
     except Exception as e:
-        context.logger.error(f"GET request failed: {e}")
+        log_error(f"GET request failed: {e}")
         context.api_response = None
 
 @step("the response is received")
@@ -16,7 +17,7 @@ def step_receive_response(context):
         context.response_status = context.api_response.status_code
         context.response_data = context.api_response.json()
     else:
-        context.logger.error("No response received")
+        log_error("No response received")
 
 @step("the response status should be 200")
 def step_verify_get_response(context):
@@ -27,10 +28,10 @@ def step_verify_get_response(context):
 def step_make_post_request(context):
     try:
         data = {"test": "data", "message": "Hello World"}
-        response = requests.post(context.build_url(context.base_url, "post"), json=data)
+        response = context.http.post(context.build_url(context.base_url, "post"), json=data)
         context.api_response = response
     except Exception as e:
-        context.logger.error(f"POST request failed: {e}")
+        log_error(f"POST request failed: {e}")
         context.api_response = None
 
 @step("the response status should be 201")
@@ -43,13 +44,25 @@ def step_verify_post_response(context):
 def step_make_invalid_request(context):
     try:
         # Try to access a non-existent endpoint
-        response = requests.get(context.build_url(context.base_url, "nonexistent"))
+        response = context.http.get(context.build_url(context.base_url, "nonexistent"))
         context.api_response = response
     except Exception as e:
-        context.logger.error(f"Invalid request failed: {e}")
+        log_error(f"Invalid request failed: {e}")
         context.api_response = None
 
 @step("the response status should be 404")
 def step_verify_error_response(context):
     assert hasattr(context, 'response_status')
-    assert context.response_status == 404 
\ No newline at end of file
+    assert context.response_status == 404
+
+@step("the user makes {count:d} concurrent GET requests to the API")
+def step_make_concurrent_get_requests(context, count):
+    context.api_responses = context.http.batch("GET", context.build_url(context.base_url, "get"), count)
+
+@step("all responses should have status {status:d}")
+def step_verify_all_responses(context, status):
+    assert hasattr(context, 'api_responses')
+    errors = [r for r in context.api_responses if isinstance(r, Exception)]
+    assert not errors, f"{len(errors)} of {len(context.api_responses)} requests failed: {errors[0]}"
+    statuses = [r.status_code for r in context.api_responses]
+    assert all(s == status for s in statuses), f"Unexpected statuses: {statuses}"
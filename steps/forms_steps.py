@@ -1,5 +1,5 @@
 from behave import step
-from playwright.sync_api import expect
+from utils.browser.shared_browser import expect
 
 @step("the user navigates to the contact form")
 def step_navigate_contact_form(context):
@@ -3,11 +3,14 @@ import os
 from helpers.constants.framework_constants import CONFIG_YAML
 from utils.misc import load_config
 import time
-from playwright.sync_api import sync_playwright
 
-from helpers.constants.framework_constants import TRACES_VIDEOS_DIR, TRACES_DIR
+import uuid
+
+from helpers.constants.framework_constants import TRACES_VIDEOS_DIR, TRACES_DIR, BROWSERLESS_TAGS
 from utils.logger import log_info
+from utils.browser.shared_browser import shared_browser
 from utils.browser.trace_manager import TraceManager
+from utils.profiling import phase
 
 
 def get_browser_config():
@@ -16,11 +19,36 @@ def get_browser_config():
     headless = headless_env in ["true", "1", "yes", "on"]
     return browser_type, headless
 
+def persistent_browser_enabled():
+    return os.getenv('PERSISTENT_BROWSER', 'false').lower() in ["true", "1", "yes", "on"]
+
+# Browser kept open across behave runs in the same process when PERSISTENT_BROWSER is enabled
+_shared_browser_manager = None
+
 def set_browser(context):
+    global _shared_browser_manager
     enable_tracing = os.getenv('ENABLE_TRACING', 'false').lower() == 'true'
     browser_type, headless = get_browser_config()
+
+    if persistent_browser_enabled():
+        # Launch once per process and keep the warm context pool across behave runs
+        if _shared_browser_manager is None:
+            _shared_browser_manager = BrowserManager(browser_type=browser_type, headless=headless, enable_tracing=enable_tracing)
+        context.browser_manager = _shared_browser_manager
+        return context.browser_manager
+
+    # The browser itself is launched lazily by the first scenario that needs a page
     context.browser_manager = BrowserManager(browser_type=browser_type, headless=headless, enable_tracing=enable_tracing)
-    return context.browser_manager.start()
+    return context.browser_manager
+
+def needs_browser(scenario):
+    return not BROWSERLESS_TAGS.intersection(scenario.effective_tags)
+
+def shutdown_shared_browser():
+    global _shared_browser_manager
+    if _shared_browser_manager is not None:
+        _shared_browser_manager.stop()
+        _shared_browser_manager = None
 
 def get_base_url():
     config = load_config()
@@ -34,10 +62,76 @@ def build_url(base_url, path=""):
     return f"{base_url}/{path}" if path else base_url
 
 def prepare_browser(context):
-    context.page = set_browser(context)
+    # Pages are handed out per scenario from the context pool (see BrowserManager.acquire_page)
+    set_browser(context)
     context.base_url = get_base_url()
     context.build_url = build_url
 
+def get_pool_config():
+    pool_config = load_config().get('browser_pool') or {}
+    return {
+        'size': int(pool_config.get('size', 1)),
+        'reset': pool_config.get('reset', 'recycle'),
+        'storage_state': pool_config.get('storage_state') or None
+    }
+
+class BrowserContextPool:
+    """
+    Keeps `size` BrowserContexts (each with one open page) warm so that handing one out to a scenario
+    is instant. Released contexts are either closed and replaced ("recycle", full isolation) or cleaned
+    in place ("reset": cookies, permissions and extra pages are cleared, cheaper but best-effort).
+    Recycled contexts are replaced synchronously after the scenario, so only "reset" saves creation time.
+    """
+
+    def __init__(self, create_context, size=1, reset="recycle"):
+        self.create_context = create_context
+        self.size = max(size, 1)
+        self.reset = reset
+        self.idle = []
+
+    def _create(self):
+        browser_context = self.create_context()
+        return browser_context, browser_context.new_page()
+
+    def warm(self):
+        while len(self.idle) < self.size:
+            self.idle.append(self._create())
+
+    def acquire(self):
+        if self.idle:
+            return self.idle.pop(0)
+        return self._create()
+
+    def release(self, browser_context, page):
+        if self.reset == "reset" and self._reset(browser_context, page):
+            self.idle.append((browser_context, page))
+        else:
+            browser_context.close()
+        # Keep `size` contexts ready; in recycle mode this creates the replacement now instead of in acquire()
+        self.warm()
+
+    @staticmethod
+    def _reset(browser_context, page):
+        try:
+            for other_page in browser_context.pages:
+                if other_page != page:
+                    other_page.close()
+            if page.is_closed():
+                return False
+            page.evaluate("() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }")
+            browser_context.clear_cookies()
+            browser_context.clear_permissions()
+            page.goto("about:blank")
+            return True
+        except Exception:
+            # release() closes the context that could not be cleaned
+            return False
+
+    def close(self):
+        for browser_context, _ in self.idle:
+            browser_context.close()
+        self.idle = []
+
 class BrowserManager:
     def __init__(self, browser_type="chromium", headless=False, enable_tracing=False):
         self.playwright = None
@@ -47,36 +141,92 @@ class BrowserManager:
         self.browser_type = browser_type
         self.enable_tracing = enable_tracing
         self.context = None
+        self.pool = None
         self.trace_manager = TraceManager(self.enable_tracing)
 
     def start(self):
+        self.launch()
+        return self.acquire_page()
+
+    def launch(self):
+        if self.browser:
+            return self.browser
         if self.enable_tracing:
             self.trace_manager.archive_old_traces()
-        self.playwright = sync_playwright().start()
-        browser_launcher = getattr(self.playwright, self.browser_type)
-        self.browser = browser_launcher.launch(headless=self.headless)
+        # Load mode: all virtual users of the process open their contexts in one browser
+        self.browser = shared_browser()
+        if self.browser is None:
+            # Imported here so browserless runs never load the Playwright driver
+            from playwright.sync_api import sync_playwright
+
+            with phase("playwright_start"):
+                self.playwright = sync_playwright().start()
+            browser_launcher = getattr(self.playwright, self.browser_type)
+            with phase("browser_launch"):
+                self.browser = browser_launcher.launch(headless=self.headless)
+
+        pool_config = get_pool_config()
+        self.storage_state = pool_config['storage_state']
+        if self.storage_state and not os.path.exists(self.storage_state):
+            log_info(f"Storage state not found, starting contexts empty: {self.storage_state}")
+            self.storage_state = None
+        # Videos and HAR files are per context, so contexts are never reused while tracing
+        reset = "recycle" if self.enable_tracing else pool_config['reset']
+        self.pool = BrowserContextPool(self._new_context, size=pool_config['size'], reset=reset)
+        self.pool.warm()
+        return self.browser
+
+    @phase("new_context")
+    def _new_context(self):
+        options = {'storage_state': self.storage_state} if self.storage_state else {}
         if self.enable_tracing:
-            self.context = self.browser.new_context(
-                record_video_dir=TRACES_VIDEOS_DIR if self.enable_tracing else None,
-                record_har_path=f"{TRACES_DIR}/har" if self.enable_tracing else None
-            )
-            self.context.tracing.start(screenshots=True, snapshots=True, sources=True)
-        else:
-            self.context = self.browser.new_context()
+            options['record_video_dir'] = TRACES_VIDEOS_DIR
+            options['record_har_path'] = f"{TRACES_DIR}/har/{uuid.uuid4().hex}.har"
+        return self.browser.new_context(**options)
 
-        self.page = self.context.new_page()
+    def fresh_context(self):
+        """A new BrowserContext outside the pool (empty cache and storage); the caller closes it."""
+        self.launch()
+        return self._new_context()
+
+    @phase("acquire_page")
+    def acquire_page(self):
+        """Check a warm BrowserContext out of the pool for the current scenario and return its page."""
+        self.release_page()
+        self.launch()
+        self.context, self.page = self.pool.acquire()
+        if self.enable_tracing:
+            self.context.tracing.start(screenshots=True, snapshots=True, sources=True)
         return self.page
 
-    def stop(self):
-        if self.enable_tracing and self.context:
-            trace_path = f"{TRACES_DIR}/trace-{self.browser_type}-{int(time.time())}.zip"
+    @phase("release_page")
+    def release_page(self):
+        if not self.context:
+            return
+        if self.enable_tracing:
+            trace_path = f"{TRACES_DIR}/trace-{self.browser_type}-{int(time.time() * 1000)}.zip"
             self.context.tracing.stop(path=trace_path)
             log_info(f"Trace saved to: {trace_path}")
-            self.trace_manager.cleanup_empty_directories()
+        self.pool.release(self.context, self.page)
+        self.context = None
+        self.page = None
 
+    @phase("browser_stop")
+    def stop(self):
         if self.context:
             self.context.close()
-        if self.browser:
+            self.context = None
+            self.page = None
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+        if self.enable_tracing:
+            self.trace_manager.cleanup_empty_directories()
+
+        # A shared browser is closed by the owner of the process (stop_shared_browser)
+        if self.browser and self.playwright:
             self.browser.close()
+        self.browser = None
         if self.playwright:
-            self.playwright.stop()
\ No newline at end of file
+            self.playwright.stop()
+            self.playwright = None
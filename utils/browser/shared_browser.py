@@ -0,0 +1,133 @@
+"""
+One browser per process, shared by threads (load mode virtual users).
+
+Playwright's sync API objects belong to the thread that created them, so threads cannot share a sync browser.
+Here one thread runs an asyncio loop that owns an async_api browser, and every other thread drives its
+contexts and pages through `LoopProxy`: a blocking facade that runs each call on the loop and waits for it.
+Calls from different threads interleave on the loop, so many contexts make progress at once.
+"""
+import asyncio
+import inspect
+import threading
+
+from utils.logger import log_info_emoji
+
+_settings = None
+_shared = None
+_lock = threading.Lock()
+
+
+def _is_playwright_object(value):
+    from playwright._impl._async_base import AsyncBase
+    return isinstance(value, AsyncBase)
+
+
+class LoopProxy:
+    """Blocking view of an async Playwright object owned by `loop`; results are proxied again where needed."""
+
+    __slots__ = ("_target", "_loop")
+
+    def __init__(self, target, loop):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_loop", loop)
+
+    def _run(self, function):
+        async def invoke():
+            result = function()
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        return asyncio.run_coroutine_threadsafe(invoke(), self._loop).result()
+
+    def _wrap(self, value):
+        if _is_playwright_object(value):
+            return LoopProxy(value, self._loop)
+        if isinstance(value, list):
+            return [self._wrap(item) for item in value]
+        return value
+
+    def __getattr__(self, name):
+        value = self._run(lambda: getattr(self._target, name))
+        if callable(value) and not _is_playwright_object(value):
+            def call(*args, **kwargs):
+                args = [unwrap(arg) for arg in args]
+                kwargs = {key: unwrap(arg) for key, arg in kwargs.items()}
+                return self._wrap(self._run(lambda: value(*args, **kwargs)))
+            return call
+        return self._wrap(value)
+
+    def __eq__(self, other):
+        return self._target == unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __repr__(self):
+        return f"<LoopProxy {self._target!r}>"
+
+
+def unwrap(value):
+    return value._target if isinstance(value, LoopProxy) else value
+
+
+def expect(actual, *args, **kwargs):
+    """playwright.sync_api.expect that also accepts objects of the shared browser."""
+    if isinstance(actual, LoopProxy):
+        from playwright.async_api import expect as async_expect
+        return actual._wrap(actual._run(lambda: async_expect(actual._target, *args, **kwargs)))
+    from playwright.sync_api import expect as sync_expect
+    return sync_expect(actual, *args, **kwargs)
+
+
+class _BrowserThread:
+    """Event loop thread with an async Playwright instance and, once requested, its browser."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="shared-browser", daemon=True)
+        self.thread.start()
+        from playwright.async_api import async_playwright
+        self.playwright = LoopProxy(None, self.loop)._run(lambda: async_playwright().start())
+        self.browser = None
+
+    def launch(self, browser_type, headless):
+        launcher = getattr(self.playwright, browser_type)
+        self.browser = LoopProxy(launcher, self.loop).launch(headless=headless)
+        return self.browser
+
+    def stop(self):
+        proxy = LoopProxy(None, self.loop)
+        if self.browser is not None:
+            proxy._run(lambda: unwrap(self.browser).close())
+        proxy._run(lambda: self.playwright.stop())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+def enable_shared_browser(browser_type, headless):
+    """Let every BrowserManager of this process use one browser, launched by the first one that needs it."""
+    global _settings
+    _settings = (browser_type, headless)
+
+
+def shared_browser():
+    """The process' shared browser (a LoopProxy), or None when sharing is not enabled."""
+    global _shared
+    if _settings is None:
+        return None
+    with _lock:
+        if _shared is None:
+            _shared = _BrowserThread()
+            _shared.launch(*_settings)
+            log_info_emoji("🌐", f"Shared {_settings[0]} browser launched for this process")
+        return _shared.browser
+
+
+def stop_shared_browser():
+    global _shared, _settings
+    with _lock:
+        if _shared is not None:
+            _shared.stop()
+            _shared = None
+        _settings = None
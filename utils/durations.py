@@ -0,0 +1,118 @@
+import os
+import json
+import glob
+import heapq
+from statistics import median
+
+from helpers.constants.framework_constants import DURATIONS_FILE, ALLURE_RESULTS_DIR
+from utils.features import parse_feature_file
+from utils.logger import log_info_emoji, log_warning
+
+# Weight of the latest run in the moving average of a scenario's duration
+SMOOTHING = 0.5
+# Expected duration (seconds) for scenarios that have never been timed
+DEFAULT_DURATION = 5.0
+
+
+def load_durations():
+    if os.path.exists(DURATIONS_FILE):
+        try:
+            with open(DURATIONS_FILE, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log_warning(f"Could not read {DURATIONS_FILE}: {e}")
+    return {}
+
+
+def save_durations(durations):
+    os.makedirs(os.path.dirname(DURATIONS_FILE), exist_ok=True)
+    tmp_file = f"{DURATIONS_FILE}.tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(durations, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, DURATIONS_FILE)
+
+
+def scenario_key(feature_name, scenario_name):
+    """Build the key Allure uses as `fullName` (outline example suffixes are dropped)."""
+    return f"{feature_name}: {scenario_name.rsplit(' -- ')[0]}"
+
+
+def record_durations(results_dir=ALLURE_RESULTS_DIR):
+    """Fold the start/stop times of new Allure results into the persisted timing store."""
+    durations = load_durations()
+    updated = 0
+    for result_file in glob.glob(os.path.join(results_dir, "*-result.json")):
+        try:
+            with open(result_file, "r") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        key, start, stop = result.get("fullName"), result.get("start"), result.get("stop")
+        if not key or start is None or stop is None:
+            continue
+
+        entry = durations.get(key)
+        # Results accumulate across runs, only ingest ones newer than what is already recorded
+        if entry and stop <= entry["stop"]:
+            continue
+
+        seconds = max(stop - start, 0) / 1000
+        if entry:
+            seconds = SMOOTHING * seconds + (1 - SMOOTHING) * entry["duration"]
+        durations[key] = {"duration": round(seconds, 3), "stop": stop}
+        updated += 1
+
+    if updated:
+        save_durations(durations)
+        log_info_emoji("⏱️ ", f"Recorded {updated} scenario durations in {DURATIONS_FILE}")
+    return durations
+
+
+class DurationEstimator:
+    """Estimate how long a work unit (list of behave locations) is expected to run."""
+
+    def __init__(self, durations=None):
+        durations = load_durations() if durations is None else durations
+        self.durations = {key: entry["duration"] for key, entry in durations.items()}
+        self.default = median(self.durations.values()) if self.durations else DEFAULT_DURATION
+        self._features = {}
+
+    def _feature(self, path):
+        if path not in self._features:
+            try:
+                self._features[path] = parse_feature_file(path)
+            except Exception as e:
+                log_warning(f"Could not parse {path}: {e}")
+                self._features[path] = {'name': '', 'scenarios': []}
+        return self._features[path]
+
+    def scenario(self, feature_name, scenario_name):
+        return self.durations.get(scenario_key(feature_name, scenario_name), self.default)
+
+    def location(self, location):
+        path, _, line = location.partition(":")
+        feature = self._feature(path)
+        scenarios = feature['scenarios']
+        if line:
+            scenarios = [scenario for scenario in scenarios if scenario['line'] == int(line)]
+        if not scenarios:
+            return self.default
+        return sum(self.scenario(feature['name'], scenario['name']) for scenario in scenarios)
+
+    def unit(self, unit):
+        return sum(self.location(location) for location in unit)
+
+
+def order_longest_first(work_units, estimator):
+    """Sort work units by expected duration, longest first (LPT order)."""
+    return sorted(work_units, key=estimator.unit, reverse=True)
+
+
+def plan_worker_loads(expected_durations, workers):
+    """Simulate LPT assignment: each unit goes to the least loaded worker. Returns per-worker loads."""
+    loads = [0.0] * max(workers, 1)
+    heapq.heapify(loads)
+    for duration in sorted(expected_durations, reverse=True):
+        heapq.heappush(loads, heapq.heappop(loads) + duration)
+    return sorted(loads, reverse=True)
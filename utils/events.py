@@ -0,0 +1,93 @@
+import os
+import json
+
+from behave.formatter.base import Formatter
+
+# Write end of the parent's event pipe when behave runs as a worker subprocess
+EVENTS_FD_ENV = "WORKER_EVENTS_FD"
+
+_sink = None
+_pipe = None
+
+
+def set_event_sink(sink):
+    """Send events to `sink(event)` instead of the pipe, e.g. a result queue when behave runs in-process."""
+    global _sink
+    _sink = sink
+
+
+def emit_event(event: dict):
+    global _pipe
+    if _sink:
+        _sink(event)
+        return
+    fd = os.getenv(EVENTS_FD_ENV)
+    if not fd:
+        return
+    if _pipe is None:
+        _pipe = os.fdopen(int(fd), "w", encoding="utf-8", buffering=1)
+    _pipe.write(json.dumps(event) + "\n")
+
+
+def read_events(pipe):
+    """Events written to the read end of an event pipe, until the writer closes it."""
+    with os.fdopen(pipe, encoding="utf-8") as reader:
+        for line in reader:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class EventFormatter(Formatter):
+    """
+    Behave formatter that reports scenario start/finish as small structured events instead of text,
+    so the parallel runner can show progress without parsing worker output.
+    """
+    name = "events"
+    description = "Structured scenario events for the parallel runner"
+
+    def __init__(self, stream_opener, config):
+        super().__init__(stream_opener, config)
+        self.current = None
+        self.started = False
+
+    def scenario(self, scenario):
+        self._finish()
+        self.current = scenario
+        self.started = False
+
+    def match(self, match):
+        # Scenarios deselected by location or tags are announced too, but never reach a step
+        if self.current is not None and not self.started:
+            self._start()
+
+    def eof(self):
+        self._finish()
+
+    def _start(self):
+        self.started = True
+        emit_event({
+            "event": "scenario_started",
+            "name": self.current.name,
+            "location": str(self.current.location),
+        })
+
+    def _finish(self):
+        if self.current is None:
+            return
+        status = self.current.status.name
+        if not self.started and status in ("skipped", "untested"):
+            self.current = None
+            return
+        if not self.started:
+            self._start()
+        scenario, self.current = self.current, None
+        emit_event({
+            "event": "scenario_finished",
+            "feature": scenario.feature.name,
+            "name": scenario.name,
+            "location": str(scenario.location),
+            "status": status,
+            "duration": round(scenario.duration, 3),
+        })
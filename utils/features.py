@@ -0,0 +1,96 @@
+import os
+import json
+
+from behave.parser import parse_file
+from behave.tag_expression import TagExpression
+
+from helpers.constants.framework_constants import DISCOVERY_CACHE_FILE
+from utils.logger import log_warning
+
+# Parsed metadata per feature file, reused while the file's mtime and size are unchanged
+_discovery_cache = None
+_discovery_cache_dirty = False
+
+
+def _load_discovery_cache():
+    global _discovery_cache
+    if _discovery_cache is None:
+        _discovery_cache = {}
+        if os.path.exists(DISCOVERY_CACHE_FILE):
+            try:
+                with open(DISCOVERY_CACHE_FILE, "r", encoding="utf-8") as f:
+                    _discovery_cache = json.load(f)
+            except (OSError, ValueError) as e:
+                log_warning(f"Could not read {DISCOVERY_CACHE_FILE}: {e}")
+    return _discovery_cache
+
+
+def save_discovery_cache():
+    global _discovery_cache_dirty
+    if not _discovery_cache_dirty:
+        return
+    os.makedirs(os.path.dirname(DISCOVERY_CACHE_FILE), exist_ok=True)
+    tmp_file = f"{DISCOVERY_CACHE_FILE}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(_discovery_cache, f)
+    os.replace(tmp_file, DISCOVERY_CACHE_FILE)
+    _discovery_cache_dirty = False
+
+
+def parse_feature_file(feature_file):
+    """Parse a feature file into plain metadata (feature name, tags and scenario locations), cached on disk."""
+    global _discovery_cache_dirty
+    cache = _load_discovery_cache()
+    stat = os.stat(feature_file)
+    key = os.path.abspath(feature_file)
+    entry = cache.get(key)
+    if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return {**entry["metadata"], "path": str(feature_file)}
+
+    metadata = _parse_feature_file(feature_file)
+    cache[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "metadata": metadata}
+    _discovery_cache_dirty = True
+    return metadata
+
+
+def _parse_feature_file(feature_file):
+    feature = parse_file(str(feature_file))
+    if feature is None:
+        return {'path': str(feature_file), 'name': '', 'tags': [], 'scenarios': []}
+
+    scenarios = []
+    # walk_scenarios() expands Scenario Outlines into one scenario per Examples row
+    for scenario in feature.walk_scenarios():
+        scenarios.append({
+            'line': scenario.line,
+            'name': scenario.name,
+            'tags': sorted(scenario.effective_tags)
+        })
+
+    return {
+        'path': str(feature_file),
+        'name': feature.name,
+        'tags': [str(tag) for tag in feature.tags],
+        'scenarios': scenarios
+    }
+
+
+def scenario_locations(feature_file):
+    """Return the `file:line` location of every scenario in a feature file."""
+    metadata = parse_feature_file(feature_file)
+    return [f"{metadata['path']}:{scenario['line']}" for scenario in metadata['scenarios']]
+
+
+def matching_scenario_locations(feature_file, tags=None):
+    """
+    Evaluate behave tag expressions (same semantics as `behave -t`, one expression per entry in `tags`)
+    against every scenario's effective tags. Returns (`file:line` locations that match, total scenarios).
+    """
+    metadata = parse_feature_file(feature_file)
+    expression = TagExpression(tags or [])
+    locations = [
+        f"{metadata['path']}:{scenario['line']}"
+        for scenario in metadata['scenarios']
+        if expression.check(scenario['tags'])
+    ]
+    return locations, len(metadata['scenarios'])
@@ -0,0 +1,106 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.misc import load_config
+
+
+def get_http_config():
+    http_config = load_config().get('http') or {}
+    return {
+        'pool_size': int(http_config.get('pool_size', 10)),
+        'timeout': float(http_config.get('timeout', 10)),
+        'retries': int(http_config.get('retries', 2)),
+        'backoff_factor': float(http_config.get('backoff_factor', 0.3))
+    }
+
+
+class HttpClient:
+    """Shared keep-alive HTTP session with a bounded connection pool, default timeout and retries."""
+
+    def __init__(self, pool_size=10, timeout=10, retries=2, backoff_factor=0.3):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._session = None
+
+    @property
+    def session(self):
+        # requests is only imported once a scenario actually sends a request
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            session = requests.Session()
+            # Retries only apply to idempotent methods and transient gateway errors; once they run out the
+            # last response is returned, so steps fail on its status code instead of a RetryError
+            retry = Retry(total=self.retries, backoff_factor=self.backoff_factor, status_forcelist=(502, 503, 504),
+                          raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def batch(self, method, url, count, concurrency=None, **kwargs):
+        """
+        Fire `count` identical requests concurrently over the shared pool.
+        Returns one entry per request, in order: the response, or the exception it raised.
+        """
+        from requests import RequestException
+
+        session = self.session  # created once here, not raced by the pool threads
+        kwargs.setdefault('timeout', self.timeout)
+
+        def send(_):
+            try:
+                return session.request(method, url, **kwargs)
+            except RequestException as e:
+                return e
+
+        workers = min(concurrency or self.pool_size, count) or 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(send, range(count)))
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def shared_http_client(min_pool_size=0):
+    """
+    One HttpClient for every behave context of this process (load mode runs many virtual users as threads),
+    its pool sized for at least `min_pool_size` concurrent requests. Closed by the owner of the process.
+    """
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            config = get_http_config()
+            config['pool_size'] = max(config['pool_size'], min_pool_size)
+            _shared_client = HttpClient(**config)
+            # Build the session now instead of racing the first requests of every thread
+            _shared_client.session
+        return _shared_client
+
+
+def close_shared_http_client():
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+            _shared_client = None
@@ -0,0 +1,178 @@
+"""
+Rolling performance baseline across runs (SQLite, reports/perf_baseline.db).
+
+Every @performance scenario stores its tracked metrics per run, browser and headless mode. A check then
+compares the current value with a high percentile of the same scenario's recent passing runs plus a
+tolerance, instead of one fixed threshold for every machine. Until enough history exists the step's own
+number is used as the limit.
+"""
+import os
+import time
+import sqlite3
+from statistics import quantiles
+
+from helpers.constants.framework_constants import PERF_BASELINE_DB
+from utils.browser.browser import get_browser_config
+from utils.logger import log_info, log_info_emoji, log_warning
+from utils.misc import load_config
+
+# Shared by the runner and all its workers so their metrics form one run
+RUN_ID_ENV = "PERF_RUN_ID"
+
+# Lower is better for all of them; nested memory values are flattened to "memory.<key>"
+TRACKED_METRICS = (
+    "load_ms", "dom_content_loaded_ms", "ttfb_ms", "fcp_ms", "lcp_ms", "cls",
+    "request_count", "failed_requests", "transfer_bytes",
+    "memory.per_tab_peak_mb", "memory.per_tab_steady_mb", "memory.retained_mb", "memory.max_js_heap_mb",
+)
+# Smallest allowed headroom above the baseline, so metrics that are (nearly) zero do not fail on noise
+METRIC_FLOORS = {
+    "cls": 0.05, "request_count": 2, "failed_requests": 0, "transfer_bytes": 10 * 1024,
+    "memory.per_tab_peak_mb": 10, "memory.per_tab_steady_mb": 10, "memory.retained_mb": 10, "memory.max_js_heap_mb": 5,
+}
+DEFAULT_FLOOR = 50  # milliseconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT NOT NULL,
+    recorded_at REAL NOT NULL,
+    feature TEXT NOT NULL,
+    scenario TEXT NOT NULL,
+    browser TEXT NOT NULL,
+    headless INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metrics_history ON metrics (feature, scenario, browser, headless, metric, recorded_at);
+"""
+
+
+def get_baseline_config():
+    performance_config = load_config().get('performance') or {}
+    return {
+        'enabled': bool(performance_config.get('baseline', True)),
+        'window': int(performance_config.get('baseline_window', 20)),
+        'min_samples': max(int(performance_config.get('baseline_min_samples', 5)), 2),
+        'percentile': int(performance_config.get('baseline_percentile', 90)),
+        'tolerance': float(performance_config.get('baseline_tolerance', 0.2)),
+    }
+
+
+def run_id():
+    """Id of the current run (set by run_tests.py; plain behave runs get one per process)."""
+    if not os.getenv(RUN_ID_ENV):
+        os.environ[RUN_ID_ENV] = new_run_id()
+    return os.environ[RUN_ID_ENV]
+
+
+def new_run_id():
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+def connect():
+    os.makedirs(os.path.dirname(PERF_BASELINE_DB), exist_ok=True)
+    # Parallel workers write at the same time, so wait for the lock instead of failing
+    connection = sqlite3.connect(PERF_BASELINE_DB, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def tracked_values(metrics):
+    flat = dict(metrics)
+    for key, value in (metrics.get("memory") or {}).items():
+        flat[f"memory.{key}"] = value
+    return {name: flat[name] for name in TRACKED_METRICS if isinstance(flat.get(name), (int, float))}
+
+
+def record_metrics(scenario, metrics):
+    browser, headless = get_browser_config()
+    values = tracked_values(metrics)
+    if not values:
+        return
+    now = time.time()
+    with connect() as connection:
+        connection.executemany(
+            "INSERT INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(run_id(), now, scenario.feature.name, scenario.name, browser, int(headless), scenario.status.name,
+              metric, float(value)) for metric, value in values.items()])
+    connection.close()
+
+
+def history(connection, feature_name, scenario_name, browser, headless, metric, window, exclude_run):
+    rows = connection.execute(
+        "SELECT value FROM metrics WHERE feature = ? AND scenario = ? AND browser = ? AND headless = ? AND metric = ? "
+        "AND status = 'passed' AND run_id != ? ORDER BY recorded_at DESC LIMIT ?",
+        (feature_name, scenario_name, browser, int(headless), metric, exclude_run, window)).fetchall()
+    return [row[0] for row in rows]
+
+
+def baseline_limit(metric, values, config):
+    """(percentile, limit) for the next value of `metric`: the configured percentile of `values` plus the tolerance."""
+    if len(values) < config['min_samples']:
+        return None, None
+    percentile = quantiles(values, n=100, method='inclusive')[min(max(config['percentile'], 1), 99) - 1]
+    floor = METRIC_FLOORS.get(metric, DEFAULT_FLOOR)
+    return percentile, max(percentile * (1 + config['tolerance']), percentile + floor)
+
+
+def metric_limit(feature_name, scenario_name, metric, default):
+    """(limit, baseline percentile or None) for `metric` of this scenario, browser and headless mode."""
+    config = get_baseline_config()
+    if not config['enabled'] or not os.path.exists(PERF_BASELINE_DB):
+        return default, None
+    browser, headless = get_browser_config()
+    connection = connect()
+    try:
+        values = history(connection, feature_name, scenario_name, browser, headless, metric, config['window'], run_id())
+    finally:
+        connection.close()
+    percentile, limit = baseline_limit(metric, values, config)
+    if limit is None:
+        return default, None
+    return limit, percentile
+
+
+def check_metric(context, metric, value, default, unit=""):
+    """Assert `value` is within the scenario's baseline for `metric` (or `default` before there is one)."""
+    limit, percentile = metric_limit(context.scenario.feature.name, context.scenario.name, metric, default)
+    source = f"baseline p{get_baseline_config()['percentile']} {percentile:.1f}{unit}" if percentile is not None \
+        else "default limit"
+    assert value <= limit, f"{metric} {value:.1f}{unit} exceeds {limit:.1f}{unit} ({source})"
+
+
+def summarize_regressions(current_run=None):
+    """Log how this run's metrics compare to the baseline of earlier runs; returns the regressions."""
+    if not os.path.exists(PERF_BASELINE_DB):
+        return []
+    config = get_baseline_config()
+    current_run = current_run or run_id()
+    connection = connect()
+    try:
+        rows = connection.execute(
+            "SELECT feature, scenario, browser, headless, metric, value FROM metrics WHERE run_id = ? "
+            "ORDER BY feature, scenario, metric", (current_run,)).fetchall()
+        compared = 0
+        regressions = []
+        for feature_name, scenario_name, browser, headless, metric, value in rows:
+            values = history(connection, feature_name, scenario_name, browser, headless, metric, config['window'], current_run)
+            percentile, limit = baseline_limit(metric, values, config)
+            if limit is None:
+                continue
+            compared += 1
+            if value > limit:
+                regressions.append((f"{feature_name}: {scenario_name}", browser, metric, value, percentile, limit))
+    finally:
+        connection.close()
+
+    if not rows:
+        return []
+    log_info_emoji("📈", f"Performance baseline: {compared} of {len(rows)} metrics compared to earlier runs "
+                        f"(p{config['percentile']} + {config['tolerance']:.0%}), {len(regressions)} regressed")
+    if regressions:
+        log_info(f"{'scenario':<36} {'browser':<9} {'metric':<26} {'value':>10} {'baseline':>10} {'limit':>10}")
+        for scenario_name, browser, metric, value, percentile, limit in regressions:
+            log_warning(f"{scenario_name[:36]:<36} {browser:<9} {metric[:26]:<26} "
+                        f"{value:>10.1f} {percentile:>10.1f} {limit:>10.1f}")
+    return regressions
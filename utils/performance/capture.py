@@ -0,0 +1,99 @@
+import os
+import json
+import sqlite3
+from datetime import datetime
+
+from helpers.constants.framework_constants import PERFORMANCE_DIR, PERFORMANCE_METRICS_FILE, PERFORMANCE_TAG
+from utils.browser.browser import get_browser_config
+from utils.logger import log_warning
+from utils.performance.baseline import record_metrics
+from utils.performance.load import load_mode
+from utils.performance.network import NetworkRecorder
+from utils.performance.timing import install_web_vitals, collect_timing
+
+
+class PerformanceCapture:
+    """
+    Network requests plus Navigation/Resource Timing and Web Vitals for one scenario's page.
+
+    Byte counts come from Resource Timing `transferSize`, which browsers report as 0 for cross-origin
+    resources served without a Timing-Allow-Origin header.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.network = NetworkRecorder(page)
+        self.timing = None
+        # Further measurements made by the scenario's steps, e.g. the browser memory report
+        self.extra = {}
+
+    def start(self):
+        install_web_vitals(self.page)
+        self.network.start()
+        return self
+
+    def collect(self):
+        """Snapshot the timing of the document loaded now (call after the page finished loading)."""
+        self.timing = collect_timing(self.page)
+        return self.metrics()
+
+    def metrics(self) -> dict:
+        return {**self.network.summary(), **(self.timing or {}), **self.extra}
+
+    def stop(self):
+        self.network.stop()
+
+
+def start_capture(context, scenario):
+    if PERFORMANCE_TAG not in scenario.effective_tags or not getattr(context, "page", None):
+        return None
+    context.performance = PerformanceCapture(context.page).start()
+    return context.performance
+
+
+def finish_capture(context, scenario):
+    """Stop the scenario's capture and store its metrics (JSON Lines file, Allure attachment, baseline database)."""
+    capture = getattr(context, "performance", None)
+    if capture is None:
+        return None
+    context.performance = None
+    capture.stop()
+    if capture.timing is None:
+        try:
+            capture.collect()
+        except Exception as e:
+            log_warning(f"Could not collect page timing: {e}")
+    metrics = capture.metrics()
+    save_scenario_metrics(scenario, metrics)
+    # Timings under load say nothing about the scenario's own baseline
+    if load_mode():
+        return metrics
+    try:
+        record_metrics(scenario, metrics)
+    except sqlite3.Error as e:
+        log_warning(f"Could not record performance baseline: {e}")
+    return metrics
+
+
+def save_scenario_metrics(scenario, metrics):
+    browser, headless = get_browser_config()
+    record = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "feature": scenario.feature.name,
+        "scenario": scenario.name,
+        "status": scenario.status.name,
+        "browser": browser,
+        "headless": headless,
+        "metrics": metrics,
+    }
+    os.makedirs(PERFORMANCE_DIR, exist_ok=True)
+    # One short line per scenario, appended atomically enough for parallel workers (O_APPEND)
+    with open(PERFORMANCE_METRICS_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+    try:
+        import allure
+        allure.attach(json.dumps(metrics, indent=2), name="performance-metrics",
+                      attachment_type=allure.attachment_type.JSON)
+    except ImportError:
+        pass
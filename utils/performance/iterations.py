@@ -0,0 +1,130 @@
+"""
+Repeated measurements for performance scenarios.
+
+A scenario tagged `@perf(iterations=20,warmup=3,context=cold)` (no spaces, behave splits tags on them) or a
+run with `--perf-iterations` loads its page warmup + iterations times. Warm iterations reload the scenario's
+own page, so caches and connections are reused; cold iterations use a fresh BrowserContext each time. Every
+metric is summarized after dropping Tukey outliers (outside 1.5 IQR), and the scenario's checks see the
+median of the kept samples.
+"""
+import os
+import re
+import json
+from statistics import median, mean, stdev, quantiles
+
+from utils.performance.network import NetworkRecorder
+from utils.performance.timing import install_web_vitals, collect_timing
+
+# Defaults for scenarios without a @perf(...) tag, set by run_tests.py --perf-iterations / --perf-warmup / --perf-context
+ITERATIONS_ENV = "PERF_ITERATIONS"
+WARMUP_ENV = "PERF_WARMUP"
+CONTEXT_ENV = "PERF_CONTEXT"
+
+PERF_TAG = re.compile(r"^perf\((?P<options>[^)]*)\)$")
+
+
+def iteration_settings(scenario):
+    """(iterations, warmup, context mode) for the scenario; the @perf(...) tag wins over the runner options."""
+    settings = {
+        "iterations": int(os.getenv(ITERATIONS_ENV, 1)),
+        "warmup": int(os.getenv(WARMUP_ENV, 0)),
+        "context": os.getenv(CONTEXT_ENV, "warm"),
+    }
+    sources = {"iterations": f"{ITERATIONS_ENV} (--perf-iterations)", "warmup": f"{WARMUP_ENV} (--perf-warmup)"}
+    for tag in scenario.effective_tags:
+        match = PERF_TAG.match(tag)
+        if not match:
+            continue
+        for option in filter(None, match.group("options").split(",")):
+            key, _, value = option.partition("=")
+            key = key.strip()
+            if key not in settings:
+                raise ValueError(f"Unknown @perf option '{key}' in @{tag}")
+            settings[key] = value.strip() if key == "context" else int(value)
+            sources[key] = f"@{tag}"
+    if settings["iterations"] < 1:
+        raise ValueError(f"iterations must be at least 1, not {settings['iterations']} (from {sources['iterations']})")
+    if settings["warmup"] < 0:
+        raise ValueError(f"warmup must not be negative, not {settings['warmup']} (from {sources['warmup']})")
+    if settings["context"] not in ("warm", "cold"):
+        raise ValueError(f"@perf context must be warm or cold, not '{settings['context']}'")
+    return settings["iterations"], settings["warmup"], settings["context"]
+
+
+def measure_page(page, url):
+    """Load `url` in `page` once and return its network and timing metrics."""
+    recorder = NetworkRecorder(page).start()
+    try:
+        page.goto(url)
+        page.wait_for_load_state("networkidle")
+        return {**recorder.summary(), **collect_timing(page)}
+    finally:
+        recorder.stop()
+
+
+def run_iterations(browser_manager, page, url, iterations, warmup=0, context="warm"):
+    """Metrics of `iterations` loads of `url` after `warmup` discarded ones."""
+    samples = []
+    if context == "warm":
+        install_web_vitals(page)
+    for index in range(warmup + iterations):
+        if context == "cold":
+            browser_context = browser_manager.fresh_context()
+            try:
+                cold_page = browser_context.new_page()
+                install_web_vitals(cold_page)
+                sample = measure_page(cold_page, url)
+            finally:
+                browser_context.close()
+        else:
+            sample = measure_page(page, url)
+        if index >= warmup:
+            samples.append(sample)
+    return samples
+
+
+def reject_outliers(values):
+    """(kept, rejected) values using Tukey fences; fewer than 4 values are all kept."""
+    if len(values) < 4:
+        return list(values), []
+    q1, _, q3 = quantiles(values, n=4, method="inclusive")
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    kept = [v for v in values if low <= v <= high]
+    return kept, [v for v in values if v < low or v > high]
+
+
+def summarize(values):
+    kept, rejected = reject_outliers(values)
+    return {
+        "samples": len(values),
+        "outliers": len(rejected),
+        "median": round(median(kept), 3),
+        "p95": round(quantiles(kept, n=20, method="inclusive")[-1], 3) if len(kept) > 1 else kept[0],
+        "mean": round(mean(kept), 3),
+        "stddev": round(stdev(kept), 3) if len(kept) > 1 else 0.0,
+        "min": min(kept),
+        "max": max(kept),
+    }
+
+
+def aggregate(samples):
+    """(median metrics, distribution per metric) over the samples' numeric metrics."""
+    distribution = {}
+    for name in samples[0]:
+        values = [s[name] for s in samples if isinstance(s.get(name), (int, float)) and not isinstance(s[name], bool)]
+        if values:
+            distribution[name] = summarize(values)
+    medians = {**samples[-1], **{name: stats["median"] for name, stats in distribution.items()}}
+    return medians, distribution
+
+
+def attach_distribution(distribution, samples, settings):
+    try:
+        import allure
+    except ImportError:
+        return
+    iterations, warmup, context = settings
+    report = {"iterations": iterations, "warmup": warmup, "context": context, "metrics": distribution,
+              "samples": [{k: v for k, v in s.items() if not isinstance(v, (list, dict))} for s in samples]}
+    allure.attach(json.dumps(report, indent=2), name="performance-distribution",
+                  attachment_type=allure.attachment_type.JSON)
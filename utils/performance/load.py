@@ -0,0 +1,249 @@
+"""
+Load mode: the selected scenarios run over and over by concurrent virtual users for a fixed duration.
+
+Every virtual user is a thread with its own behave runner and context, so `before_all` gives it its own
+BrowserManager and every scenario a fresh BrowserContext. All of a process' users open their contexts in one
+shared browser (see utils.browser.shared_browser), so a user costs a context, not a browser. Scenarios that
+need no browser (@api, @no_browser) only cost a thread and share one HttpClient per process, which keeps high
+user counts cheap for the API steps. `processes` spreads the users over several processes (one browser each)
+when one process is CPU-bound.
+"""
+import os
+import json
+import time
+import queue
+import threading
+import multiprocessing
+from statistics import quantiles
+
+from behave.configuration import Configuration
+from behave.runner import Context, Runner
+from behave.runner_util import parse_features
+from behave.step_registry import registry as step_registry
+
+from helpers.constants.framework_constants import LOAD_DIR
+from utils.logger import log_info, log_info_emoji, log_warning
+
+# Number of virtual users in this process; set while a load run is active
+LOAD_USERS_ENV = "LOAD_USERS"
+
+EXECUTED = ("passed", "failed")
+
+
+def load_mode():
+    return bool(os.getenv(LOAD_USERS_ENV))
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0]
+    return quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+class LoadStats:
+    """Durations and failures per scenario and per step, kept by one virtual user and merged at the end."""
+
+    def __init__(self):
+        self.scenarios = {}
+        self.steps = {}
+        self.errors = []
+
+    @staticmethod
+    def _add(group, name, seconds, passed):
+        entry = group.setdefault(name, {"durations": [], "failures": 0})
+        entry["durations"].append(seconds)
+        if not passed:
+            entry["failures"] += 1
+
+    def add_feature(self, feature):
+        for scenario in feature.walk_scenarios():
+            if scenario.status.name not in EXECUTED:
+                continue
+            # Scenario names are only unique within a feature (see utils.durations.scenario_key)
+            self._add(self.scenarios, f"{feature.name}: {scenario.name}", scenario.duration,
+                      scenario.status.name == "passed")
+            for step in scenario.all_steps:
+                if step.status.name in EXECUTED:
+                    self._add(self.steps, f"{feature.name}: {step.keyword} {step.name}", step.duration,
+                              step.status.name == "passed")
+
+    def merge(self, other):
+        for target, source in ((self.scenarios, other.scenarios), (self.steps, other.steps)):
+            for name, entry in source.items():
+                merged = target.setdefault(name, {"durations": [], "failures": 0})
+                merged["durations"].extend(entry["durations"])
+                merged["failures"] += entry["failures"]
+        self.errors.extend(other.errors)
+        return self
+
+    @property
+    def failures(self):
+        return sum(entry["failures"] for entry in self.scenarios.values()) + len(self.errors)
+
+
+class VirtualUserRunner(Runner):
+    """Behave runner of one virtual user; the module-global step registry is filled only once per process."""
+    steps_loaded = False
+    steps_lock = threading.Lock()
+
+    def load_step_definitions(self, extra_step_paths=None):
+        with VirtualUserRunner.steps_lock:
+            if VirtualUserRunner.steps_loaded:
+                return
+            super().load_step_definitions(extra_step_paths)
+            VirtualUserRunner.steps_loaded = True
+
+
+def load_behave_args(paths, tags=None):
+    # Output capture swaps sys.stdout process-wide, so it cannot be used by concurrent runners
+    args = ['--no-capture', '--no-capture-stderr', '--no-logcapture', '--no-summary', '--no-snippets']
+    for tag in tags or []:
+        args.extend(['-t', tag])
+    return args + [str(path) for path in paths]
+
+
+def virtual_user(behave_args, deadline, start_delay=0.0):
+    """Run the selected scenarios repeatedly until `deadline` (time.time()) and return their timings."""
+    stats = LoadStats()
+    time.sleep(start_delay)
+    config = Configuration(command_args=behave_args)
+    runner = VirtualUserRunner(config)
+    try:
+        with runner.path_manager:
+            runner.setup_paths()
+            runner.context = Context(runner)
+            runner.step_registry = step_registry
+            runner.load_hooks()
+            runner.load_step_definitions()
+            locations = [location for location in runner.feature_locations() if not config.exclude(location)]
+            features = parse_features(locations, language=config.lang)
+            # file:line locations mark the other scenarios skipped, which feature.reset() would undo
+            unselected = [scenario for feature in features for scenario in feature.walk_scenarios()
+                          if scenario.should_skip]
+            runner.setup_capture()
+            runner.run_hook("before_all", runner.context)
+            try:
+                # One iteration is one pass over every selected scenario, the deadline is checked in between
+                while time.time() < deadline and not runner.aborted:
+                    for feature in features:
+                        feature.reset()
+                        for scenario in unselected:
+                            if scenario.feature is feature:
+                                scenario.mark_skipped()
+                        runner.feature = feature
+                        feature.run(runner)
+                        stats.add_feature(feature)
+            finally:
+                runner.run_hook("after_all", runner.context)
+    except Exception as e:
+        stats.errors.append(f"{type(e).__name__}: {e}")
+    return stats
+
+
+def run_virtual_users(behave_args, users, deadline, ramp_up=0.0):
+    """`users` virtual-user threads in this process; starts are spread evenly over `ramp_up` seconds."""
+    from utils.browser.browser import get_browser_config
+    from utils.browser.shared_browser import enable_shared_browser, stop_shared_browser
+    from utils.http_client import close_shared_http_client
+
+    os.environ[LOAD_USERS_ENV] = str(users)
+    # Launched by the first user that needs a page, so API-only loads never start a browser
+    enable_shared_browser(*get_browser_config())
+    results = [None] * users
+
+    def run(index):
+        results[index] = virtual_user(behave_args, deadline, start_delay=ramp_up * index / users)
+
+    threads = [threading.Thread(target=run, args=(index,), name=f"virtual-user-{index}") for index in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    close_shared_http_client()
+    stop_shared_browser()
+
+    stats = LoadStats()
+    for result in results:
+        stats.merge(result)
+    return stats
+
+
+def load_process(behave_args, users, deadline, ramp_up, result_queue):
+    result_queue.put(run_virtual_users(behave_args, users, deadline, ramp_up))
+
+
+def run_load(paths, tags=None, users=10, duration=60, ramp_up=0.0, processes=1):
+    """Run the selected scenarios with `users` virtual users for `duration` seconds; returns the merged stats."""
+    # The persistent browser of parallel workers is a sync one and belongs to a single thread
+    os.environ.pop('PERSISTENT_BROWSER', None)
+    behave_args = load_behave_args(paths, tags)
+    processes = max(1, min(processes, users))
+    started = time.time()
+    deadline = started + duration
+
+    if processes == 1:
+        stats = run_virtual_users(behave_args, users, deadline, ramp_up)
+    else:
+        result_queue = multiprocessing.Queue()
+        shares = [users // processes + (1 if index < users % processes else 0) for index in range(processes)]
+        workers = [multiprocessing.Process(target=load_process, args=(behave_args, share, deadline, ramp_up, result_queue))
+                   for share in shares]
+        for worker in workers:
+            worker.start()
+        stats = LoadStats()
+        pending = len(workers)
+        # Read before join: a process does not exit while its result is still in the queue's pipe
+        while pending:
+            try:
+                stats.merge(result_queue.get(timeout=1))
+                pending -= 1
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers):
+                    stats.errors.append(f"{pending} load process(es) exited without results")
+                    break
+        for worker in workers:
+            worker.join()
+
+    return stats, time.time() - started
+
+
+def summarize_load(stats, elapsed, users):
+    """Log throughput and latency percentiles per scenario and step, and write reports/load/summary.json."""
+    def describe(entry):
+        durations = entry["durations"]
+        return {
+            "count": len(durations),
+            "failures": entry["failures"],
+            "per_second": round(len(durations) / elapsed, 2),
+            "p50_ms": round(percentile(durations, 50) * 1000, 1),
+            "p90_ms": round(percentile(durations, 90) * 1000, 1),
+            "p95_ms": round(percentile(durations, 95) * 1000, 1),
+            "p99_ms": round(percentile(durations, 99) * 1000, 1),
+            "max_ms": round(max(durations) * 1000, 1),
+        }
+
+    summary = {
+        "users": users,
+        "elapsed_seconds": round(elapsed, 1),
+        "scenarios": {name: describe(entry) for name, entry in stats.scenarios.items()},
+        "steps": {name: describe(entry) for name, entry in stats.steps.items()},
+        "errors": stats.errors,
+    }
+    os.makedirs(LOAD_DIR, exist_ok=True)
+    summary_file = os.path.join(LOAD_DIR, "summary.json")
+    with open(summary_file, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    iterations = sum(entry["count"] for entry in summary["scenarios"].values())
+    log_info_emoji("🚦", f"Load: {users} users for {elapsed:.1f}s, {iterations} scenario runs "
+                        f"({iterations / elapsed:.2f}/s), {stats.failures} failed, details in {summary_file}")
+    for title, group in (("scenario", summary["scenarios"]), ("step", summary["steps"])):
+        if not group:
+            continue
+        log_info(f"{title:<48} {'count':>7} {'fail':>5} {'/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for name, row in sorted(group.items(), key=lambda item: item[1]["p95_ms"], reverse=True):
+            log_info(f"{name[:48]:<48} {row['count']:>7} {row['failures']:>5} {row['per_second']:>7.2f} "
+                     f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}")
+    for error in stats.errors[:5]:
+        log_warning(f"Virtual user failed: {error}")
+    return summary
@@ -0,0 +1,147 @@
+"""
+Memory of the browser under test, sampled while a scenario opens and switches between real tabs.
+
+The browser is not a child Playwright tells us about, so its processes are found as descendants of this
+Python process (Python -> Playwright driver -> browser -> renderers / GPU / utility processes); the driver
+itself is left out. PSS is used where the OS reports it (Linux), as RSS counts memory shared between
+browser processes once per process. Chromium additionally reports each tab's JS heap through CDP.
+"""
+import time
+from statistics import median
+
+from utils.logger import log_info_emoji
+
+MB = 1024 * 1024
+DRIVER_NAMES = {"node", "node.exe"}
+
+
+def browser_processes():
+    import psutil  # only memory scenarios pay for the import
+    processes = []
+    for process in psutil.Process().children(recursive=True):
+        try:
+            if process.name() not in DRIVER_NAMES:
+                processes.append(process)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return processes
+
+
+def sample_browser_memory():
+    """Total RSS and PSS (MB) of the browser process tree right now."""
+    import psutil
+    rss = pss = 0
+    count = 0
+    for process in browser_processes():
+        try:
+            info = process.memory_full_info()
+        except psutil.AccessDenied:
+            try:
+                info = process.memory_info()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        except psutil.NoSuchProcess:
+            continue
+        count += 1
+        rss += info.rss
+        pss += getattr(info, "pss", info.rss)
+    return {"processes": count, "rss_mb": round(rss / MB, 1), "pss_mb": round(pss / MB, 1)}
+
+
+def js_heap_mb(page):
+    """Used JS heap of `page` in MB via CDP Performance.getMetrics (Chromium only, None elsewhere)."""
+    try:
+        session = page.context.new_cdp_session(page)
+    except Exception:
+        return None
+    try:
+        session.send("Performance.enable")
+        metrics = {m["name"]: m["value"] for m in session.send("Performance.getMetrics")["metrics"]}
+        return round(metrics.get("JSHeapUsedSize", 0) / MB, 1)
+    finally:
+        session.detach()
+
+
+class MemoryProbe:
+    """
+    Opens real tabs in the scenario's BrowserContext and samples the browser after each step.
+
+    baseline: before the first extra tab, peak: highest sample while tabs were opened and visited,
+    steady: median of a few samples after the tabs settled, retained: after the extra tabs were closed
+    again (memory that did not come back is what a leak looks like).
+    """
+
+    def __init__(self, browser_context, settle_seconds=1.0, samples=3):
+        self.browser_context = browser_context
+        self.settle_seconds = settle_seconds
+        self.samples = samples
+        self.pages = []
+        self.tabs = []
+        self.baseline = sample_browser_memory()
+        self.peak = dict(self.baseline)
+
+    def _sample(self):
+        sample = sample_browser_memory()
+        if sample["pss_mb"] > self.peak["pss_mb"]:
+            self.peak = sample
+        return sample
+
+    def _settled_sample(self):
+        time.sleep(self.settle_seconds)
+        samples = []
+        for _ in range(self.samples):
+            samples.append(self._sample())
+            time.sleep(self.settle_seconds / self.samples)
+        return {
+            "processes": samples[-1]["processes"],
+            "rss_mb": round(median(s["rss_mb"] for s in samples), 1),
+            "pss_mb": round(median(s["pss_mb"] for s in samples), 1),
+        }
+
+    def open_tabs(self, url, count):
+        for _ in range(count):
+            page = self.browser_context.new_page()
+            page.goto(url)
+            page.wait_for_load_state("load")
+            self.pages.append(page)
+            sample = self._sample()
+            self.tabs.append({
+                "tab": len(self.pages),
+                "pss_mb": sample["pss_mb"],
+                "rss_mb": sample["rss_mb"],
+                "js_heap_mb": js_heap_mb(page),
+            })
+        return self.pages
+
+    def visit_tabs(self, rounds=1):
+        for _ in range(rounds):
+            for page in self.pages:
+                page.bring_to_front()
+                page.reload()
+                page.wait_for_load_state("load")
+                self._sample()
+
+    def finish(self):
+        """Close the extra tabs and return the memory report."""
+        steady = self._settled_sample()
+        heaps = [tab["js_heap_mb"] for tab in self.tabs if tab["js_heap_mb"] is not None]
+        for page in self.pages:
+            page.close()
+        self.pages = []
+        retained = self._settled_sample()
+        tab_count = max(len(self.tabs), 1)
+        report = {
+            "tabs": len(self.tabs),
+            "baseline": self.baseline,
+            "peak": self.peak,
+            "steady": steady,
+            "retained": retained,
+            "per_tab_peak_mb": round((self.peak["pss_mb"] - self.baseline["pss_mb"]) / tab_count, 1),
+            "per_tab_steady_mb": round((steady["pss_mb"] - self.baseline["pss_mb"]) / tab_count, 1),
+            "retained_mb": round(retained["pss_mb"] - self.baseline["pss_mb"], 1),
+            "max_js_heap_mb": max(heaps) if heaps else None,
+            "per_tab": self.tabs,
+        }
+        log_info_emoji("🧠", f"Browser memory: baseline {self.baseline['pss_mb']} MB, peak {self.peak['pss_mb']} MB, "
+                            f"steady {report['per_tab_steady_mb']} MB/tab, retained after close {report['retained_mb']} MB")
+        return report
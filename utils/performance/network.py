@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page, Request, Response
+
+
+class NetworkRecorder:
+    """
+    Records every request a page makes through Playwright's request events. Only a compact record is kept
+    per request (no bodies); sizes come from the browser's Resource Timing, see `utils.performance.timing`.
+    """
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.requests = []
+
+    def start(self):
+        self.page.on("response", self._on_response)
+        self.page.on("requestfailed", self._on_failed)
+        return self
+
+    def stop(self):
+        self.page.remove_listener("response", self._on_response)
+        self.page.remove_listener("requestfailed", self._on_failed)
+
+    def _record(self, request: Request, status=None, failure=None):
+        self.requests.append({
+            "url": request.url,
+            "host": urlsplit(request.url).netloc,
+            "method": request.method,
+            "type": request.resource_type,
+            "status": status,
+            "failure": failure,
+        })
+
+    def _on_response(self, response: Response):
+        # Everything recorded is already on the event objects, no extra round trip to the browser
+        self._record(response.request, status=response.status)
+
+    def _on_failed(self, request: Request):
+        self._record(request, failure=request.failure)
+
+    def summary(self):
+        by_type = {}
+        for request in self.requests:
+            by_type[request["type"]] = by_type.get(request["type"], 0) + 1
+        return {
+            "request_count": len(self.requests),
+            "failed_requests": sum(1 for r in self.requests if r["failure"] or (r["status"] or 0) >= 400),
+            "requests_by_type": by_type,
+            "hosts": len({r["host"] for r in self.requests}),
+        }
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+# Installed before any page script runs: buffers the paint / LCP / layout-shift entries that are only
+# observable through a PerformanceObserver. Guarded so a reused page never installs it twice.
+WEB_VITALS_INIT_JS = """
+(() => {
+    if (window.__webVitals) return;
+    const vitals = window.__webVitals = {lcp: null, cls: 0};
+    const observe = (type, callback) => {
+        try {
+            new PerformanceObserver((list) => list.getEntries().forEach(callback)).observe({type, buffered: true});
+        } catch (e) { /* entry type not supported by this browser */ }
+    };
+    observe('largest-contentful-paint', (entry) => { vitals.lcp = entry.startTime; });
+    observe('layout-shift', (entry) => { if (!entry.hadRecentInput) vitals.cls += entry.value; });
+})();
+"""
+
+# Navigation Timing, paint entries and a Resource Timing summary, all in milliseconds / bytes
+COLLECT_TIMING_JS = """
+() => {
+    const round = (value) => value == null ? null : Math.round(value * 10) / 10;
+    const navigation = performance.getEntriesByType('navigation')[0];
+    const paint = Object.fromEntries(performance.getEntriesByType('paint').map((e) => [e.name, e.startTime]));
+    const resources = performance.getEntriesByType('resource');
+    const vitals = window.__webVitals || {};
+    const transferred = resources.reduce((sum, r) => sum + (r.transferSize || 0), 0)
+        + (navigation ? navigation.transferSize || 0 : 0);
+    return {
+        ttfb_ms: navigation ? round(navigation.responseStart) : null,
+        dom_content_loaded_ms: navigation ? round(navigation.domContentLoadedEventEnd) : null,
+        load_ms: navigation && navigation.loadEventEnd ? round(navigation.loadEventEnd) : null,
+        fcp_ms: round(paint['first-contentful-paint']),
+        lcp_ms: round(vitals.lcp),
+        cls: vitals.cls == null ? null : Math.round(vitals.cls * 1000) / 1000,
+        resource_count: resources.length,
+        transfer_bytes: transferred,
+        slowest_resources: resources
+            .sort((a, b) => b.duration - a.duration)
+            .slice(0, 5)
+            .map((r) => ({name: r.name, type: r.initiatorType, duration_ms: round(r.duration), bytes: r.transferSize || 0}))
+    };
+}
+"""
+
+
+def install_web_vitals(page: Page):
+    page.add_init_script(WEB_VITALS_INIT_JS)
+
+
+def collect_timing(page: Page) -> dict:
+    """Navigation/Resource Timing and Web Vitals of the document currently loaded in `page`."""
+    return page.evaluate(COLLECT_TIMING_JS)
@@ -1,5 +1,14 @@
 import argparse
 
+def count_at_least(minimum):
+    """argparse type for integer options with a lower bound (e.g. --perf-iterations must be >= 1)."""
+    def parse(value):
+        number = int(value)
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {number}")
+        return number
+    return parse
+
 def run_options():
     parser = argparse.ArgumentParser(
         description="Run automation tests with flexible options",
@@ -14,10 +23,20 @@ def run_options():
       python run_tests.py --parallel                   # Run tests in parallel
       python run_tests.py --parallel --headless        # Run parallel tests in headless mode
       python run_tests.py --parallel --workers 7       # Run with 7 parallel workers
+      python run_tests.py --parallel --granularity scenario  # Schedule individual scenarios across workers
+      python run_tests.py --parallel --persistent-workers    # Reuse one browser per worker across scenarios
       python run_tests.py --tags @smoke                # Run only smoke tests
       python run_tests.py --tags @smoke @regression    # Run smoke and regression tests
       python run_tests.py --serve-report               # Serve Allure report after tests
+      python run_tests.py --generate-report            # Update the static report in reports/allure-report
+      python run_tests.py --parallel --live-report 30  # Re-render the report every 30s while tests run
+      python run_tests.py --report-only --serve-report # Re-render and open the report without running tests
       python run_tests.py --tracing                    # Enable Playwright tracing
+      python run_tests.py --load --users 50 --duration 120 --tags @api  # 50 virtual users repeat the API scenarios
+      python run_tests.py --load --users 8 --load-processes 2 features/performance.feature:4  # Browser load over 2 processes
+      python run_tests.py --tags @performance --perf-iterations 20 --perf-warmup 3  # Median of 20 loads per scenario
+      python run_tests.py --parallel --profile phases  # Time startup, browser, steps and AI heals per worker
+      python run_tests.py --parallel --profile cprofile  # Also write a cProfile .prof file per behave process
         """
     )
 
@@ -46,6 +65,25 @@ def run_options():
         help='Number of parallel workers (default: CPU count or if specified)'
     )
 
+    parser.add_argument(
+        '--granularity',
+        choices=['feature', 'scenario'],
+        default='feature',
+        help='Unit of work pulled by parallel workers: whole feature files or single scenarios (default: feature)'
+    )
+
+    parser.add_argument(
+        '--persistent-workers',
+        action='store_true',
+        help='Parallel workers run behave in-process and keep their browser open, with a fresh context per scenario'
+    )
+
+    parser.add_argument(
+        '--no-healing-service',
+        action='store_true',
+        help='In parallel mode, let every worker query the AI model directly instead of the shared healing service'
+    )
+
     parser.add_argument(
         '--tags',
         nargs='+',
@@ -58,6 +96,71 @@ def run_options():
         help='Enable Playwright tracing (saves trace files)'
     )
 
+    parser.add_argument(
+        '--profile',
+        choices=['phases', 'cprofile', 'py-spy'],
+        help='Record a phase breakdown per worker into reports/profiling and summarize it; '
+             'cprofile / py-spy additionally profile every behave process (py-spy must be installed)'
+    )
+
+    parser.add_argument(
+        '--perf-iterations',
+        type=count_at_least(1),
+        help='Load the page of every performance scenario this many times and check the median '
+             '(scenarios tagged @perf(iterations=N,warmup=N,context=warm|cold) keep their own settings)'
+    )
+
+    parser.add_argument(
+        '--perf-warmup',
+        type=count_at_least(0),
+        default=0,
+        help='Discarded loads before the measured iterations (default: 0)'
+    )
+
+    parser.add_argument(
+        '--perf-context',
+        choices=['warm', 'cold'],
+        default='warm',
+        help='warm: reload the scenario page (cached) | cold: fresh BrowserContext per iteration (default: warm)'
+    )
+
+    parser.add_argument(
+        '--load',
+        action='store_true',
+        help='Load mode: virtual users (one thread and behave context each) repeat the selected scenarios '
+             'for --duration seconds and report throughput and latency percentiles per step'
+    )
+
+    parser.add_argument(
+        '--users',
+        type=int,
+        default=10,
+        help='Load mode: number of concurrent virtual users (default: 10)'
+    )
+
+    parser.add_argument(
+        '--duration',
+        type=int,
+        default=60,
+        metavar='SECONDS',
+        help='Load mode: how long the virtual users keep starting scenario runs, ramp-up included (default: 60)'
+    )
+
+    parser.add_argument(
+        '--ramp-up',
+        type=float,
+        default=0,
+        metavar='SECONDS',
+        help='Load mode: spread the virtual user starts over this many seconds (default: 0)'
+    )
+
+    parser.add_argument(
+        '--load-processes',
+        type=int,
+        default=1,
+        help='Load mode: split the virtual users over this many processes (default: 1)'
+    )
+
     parser.add_argument(
         'features',
         nargs='*',
@@ -70,4 +173,23 @@ def run_options():
         help='Serve Allure report after test completion'
     )
 
+    parser.add_argument(
+        '--generate-report',
+        action='store_true',
+        help='Update the static Allure report (reports/allure-report) after the run, keeping history trends'
+    )
+
+    parser.add_argument(
+        '--live-report',
+        type=int,
+        metavar='SECONDS',
+        help='Re-render the static Allure report every SECONDS while tests run (skipped when nothing changed)'
+    )
+
+    parser.add_argument(
+        '--report-only',
+        action='store_true',
+        help='Do not run tests, only re-render the Allure report from existing results'
+    )
+
     return parser.parse_args()
\ No newline at end of file
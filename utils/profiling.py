@@ -0,0 +1,159 @@
+"""
+Phase timing for test runs.
+
+Code under test wraps interesting phases with `phase("name")` (context manager or decorator). When profiling
+is enabled (PROFILE_ENV, set by `run_tests.py --profile`), every process accumulates count / total / max
+seconds per phase and writes them to reports/profiling/phases-*.json; the runner merges those files into
+one summary. When disabled, `phase()` costs a single environment lookup.
+"""
+import os
+import glob
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from helpers.constants.framework_constants import PROFILING_DIR
+from utils.logger import log_info, log_info_emoji, log_warning
+
+# Profiling mode of the run: "phases", "cprofile" or "py-spy" (phase timing is on in every mode)
+PROFILE_ENV = "PROFILE_PHASES"
+# Worker that started this process, used to name the per-process report
+WORKER_ENV = "PROFILE_WORKER_ID"
+# time.time() when the runner spawned this behave process, to measure interpreter start and imports
+SPAWN_TIME_ENV = "PROFILE_SPAWN_TIME"
+
+_phases = {}
+
+
+def profiling_mode():
+    return os.getenv(PROFILE_ENV)
+
+
+def reset_phases():
+    """Forget phases inherited from the parent when a worker process is forked."""
+    _phases.clear()
+
+
+def record(name, seconds):
+    entry = _phases.get(name)
+    if entry is None:
+        entry = _phases[name] = {"count": 0, "total": 0.0, "max": 0.0}
+    entry["count"] += 1
+    entry["total"] += seconds
+    entry["max"] = max(entry["max"], seconds)
+
+
+class _Phase:
+    """Times the wrapped block or function under `name`."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter() if profiling_mode() else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start)
+        return False
+
+    def __call__(self, function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Phase(self.name):
+                return function(*args, **kwargs)
+        return wrapper
+
+
+def phase(name):
+    return _Phase(name)
+
+
+def record_spawn_time():
+    """Record interpreter start, imports and behave setup for a process spawned by the runner."""
+    spawned = os.getenv(SPAWN_TIME_ENV)
+    if profiling_mode() and spawned:
+        record("process_startup", time.time() - float(spawned))
+        # Only the first behave run of a process pays for its startup
+        os.environ.pop(SPAWN_TIME_ENV, None)
+
+
+def write_phase_report():
+    """Write this process' phases so far (cumulative, rewritten on every call)."""
+    if not profiling_mode() or not _phases:
+        return
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    worker = os.getenv(WORKER_ENV, "main")
+    report_file = os.path.join(PROFILING_DIR, f"phases-{worker}-{os.getpid()}.json")
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump({"worker": worker, "pid": os.getpid(), "phases": _phases}, f, indent=2)
+
+
+def clear_phase_reports():
+    for report_file in glob.glob(os.path.join(PROFILING_DIR, "phases-*.json")):
+        os.remove(report_file)
+
+
+def summarize_phase_reports():
+    """Merge every per-process phase report into reports/profiling/summary.json and log the breakdown."""
+    summary = {}
+    workers = {}
+    for report_file in glob.glob(os.path.join(PROFILING_DIR, "phases-*.json")):
+        try:
+            with open(report_file, encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError) as e:
+            log_warning(f"Could not read {report_file}: {e}")
+            continue
+        worker_phases = workers.setdefault(report["worker"], {})
+        for name, entry in report["phases"].items():
+            for target in (summary, worker_phases):
+                merged = target.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+                merged["count"] += entry["count"]
+                merged["total"] += entry["total"]
+                merged["max"] = max(merged["max"], entry["max"])
+
+    if not summary:
+        return None
+    with open(os.path.join(PROFILING_DIR, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({"phases": summary, "workers": workers}, f, indent=2)
+
+    log_info_emoji("⏱️ ", f"Phase breakdown (all workers), details in {PROFILING_DIR}/summary.json")
+    log_info(f"{'phase':<40} {'count':>7} {'total s':>9} {'mean s':>8} {'max s':>8}")
+    for name, entry in sorted(summary.items(), key=lambda item: item[1]["total"], reverse=True)[:25]:
+        log_info(f"{name[:40]:<40} {entry['count']:>7} {entry['total']:>9.2f} "
+                 f"{entry['total'] / entry['count']:>8.3f} {entry['max']:>8.3f}")
+    return summary
+
+
+def profiler_command(cmd, worker_id):
+    """Wrap a `python -m behave ...` command in cProfile or py-spy, depending on the profiling mode."""
+    mode = profiling_mode()
+    name = os.path.join(PROFILING_DIR, f"worker-{worker_id}-{int(time.time() * 1000)}")
+    if mode == "cprofile":
+        return [cmd[0], "-m", "cProfile", "-o", f"{name}.prof"] + cmd[1:]
+    if mode == "py-spy":
+        return ["py-spy", "record", "--output", f"{name}.svg", "--"] + cmd
+    return cmd
+
+
+@contextmanager
+def process_profiler(worker_id):
+    """cProfile this whole process (persistent workers run behave in-process)."""
+    if profiling_mode() == "py-spy":
+        log_warning("py-spy only wraps behave subprocesses, persistent workers record phase timings only")
+    if profiling_mode() != "cprofile":
+        yield
+        return
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(PROFILING_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(PROFILING_DIR, f"worker-{worker_id}-{os.getpid()}.prof"))
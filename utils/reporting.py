@@ -1,36 +1,123 @@
 import os
 import shutil
+import hashlib
+import threading
 import subprocess
 
-from helpers.constants.framework_constants import SCREENSHOTS_DIR, ALLURE_RESULTS_DIR
+from helpers.constants.framework_constants import (
+    SCREENSHOTS_DIR, ALLURE_RESULTS_DIR, ALLURE_REPORT_DIR, ALLURE_HISTORY_DIR
+)
 from utils.logger import log_info_emoji, log_warning, log_failure
 
+# Fingerprint of the results the report was last rendered from
+REPORT_STAMP = '.results-fingerprint'
 
-def combine_allure_reports(report_dirs):
-    """Combine Allure reports from multiple workers into a single report."""
-    main_report_dir = "reports/allure-results"
 
-    # Create the main report directory
-    os.makedirs(main_report_dir, exist_ok=True)
+def results_fingerprint(results_dir=ALLURE_RESULTS_DIR):
+    """Cheap change detector for the results directory: names, sizes and mtimes of the result files."""
+    digest = hashlib.sha1()
+    try:
+        entries = sorted((entry for entry in os.scandir(results_dir) if entry.is_file()), key=lambda e: e.name)
+    except FileNotFoundError:
+        return None
+    for entry in entries:
+        stat = entry.stat()
+        digest.update(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def _replace_tree(source, target):
+    shutil.rmtree(target, ignore_errors=True)
+    shutil.copytree(source, target)
+
+
+def advance_report_history(report_dir=ALLURE_REPORT_DIR):
+    """
+    Start a new trend point: the history of the last rendered report becomes the input of this run's renders.
+    Called once per test run; renders themselves never write the history back, so live and repeated
+    renders of the same results do not add extra points.
+    """
+    history = os.path.join(report_dir, 'history')
+    if os.path.isdir(history):
+        _replace_tree(history, ALLURE_HISTORY_DIR)
+    else:
+        # An empty history still marks it as taken, so renders never fall back to the report's own history
+        os.makedirs(ALLURE_HISTORY_DIR, exist_ok=True)
+
+
+def generate_report(results_dir=ALLURE_RESULTS_DIR, report_dir=ALLURE_REPORT_DIR, force=False):
+    """
+    Render the static HTML report, skipping the work when no result changed since the last render.
+    Trend data of earlier runs comes from ALLURE_HISTORY_DIR (see `advance_report_history`).
+    Returns True when the report is up to date.
+    """
+    fingerprint = results_fingerprint(results_dir)
+    if fingerprint is None:
+        log_warning(f"No Allure results found in {results_dir}")
+        return False
+    stamp_file = os.path.join(report_dir, REPORT_STAMP)
+    if not force and os.path.exists(stamp_file):
+        with open(stamp_file, encoding='utf-8') as f:
+            if f.read().strip() == fingerprint:
+                log_info_emoji("📊", f"Allure report is up to date: {report_dir}")
+                return True
+
+    if not os.path.isdir(ALLURE_HISTORY_DIR):
+        # Reports rendered before the history was kept separately
+        advance_report_history(report_dir)
+    if os.path.isdir(ALLURE_HISTORY_DIR):
+        _replace_tree(ALLURE_HISTORY_DIR, os.path.join(results_dir, 'history'))
+
+    try:
+        completed = subprocess.run(['allure', 'generate', results_dir, '-o', report_dir, '--clean'],
+                                   capture_output=True, text=True)
+    except FileNotFoundError:
+        log_failure("Allure command line not found, install it to generate the HTML report")
+        return False
+    if completed.returncode != 0:
+        log_failure(f"Allure report generation failed: {completed.stderr.strip() or completed.stdout.strip()}")
+        return False
+
+    with open(stamp_file, 'w', encoding='utf-8') as f:
+        f.write(fingerprint)
+    log_info_emoji("📊", f"Allure report generated in: {report_dir}")
+    return True
+
+
+class LiveReport:
+    """Re-render the report in the background every `interval` seconds while results keep arriving."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        log_info_emoji("📊", f"Live Allure report every {self.interval}s in: {ALLURE_REPORT_DIR}")
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            if results_fingerprint() is not None:
+                generate_report()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
 
-    # Copy all results from worker directories to the main directory
-    for report_dir in report_dirs:
-        if os.path.exists(report_dir):
-            for item in os.listdir(report_dir):
-                src = os.path.join(report_dir, item)
-                dst = os.path.join(main_report_dir, item)
-                if os.path.isfile(src):
-                    shutil.copy2(src, dst)
-                elif os.path.isdir(src):
-                    shutil.copytree(src, dst, dirs_exist_ok=True)
+def open_report(report_dir=ALLURE_REPORT_DIR):
+    log_info_emoji("📊", "Serving Allure report")
+    subprocess.run(['allure', 'open', report_dir])
 
-    log_info_emoji("📊", f"Allure reports combined in: reports/allure-results")
-    log_info_emoji("📖", "To view the report: allure serve reports/allure-results")
 
 def server_report(args):
     if args.serve_report:
-        log_info_emoji("📊", "Serving Allure report")
-        subprocess.run(['allure', 'serve', ALLURE_RESULTS_DIR])
+        if generate_report():
+            open_report()
+    elif args.generate_report or args.live_report:
+        generate_report()
     else:
         log_info_emoji("📊", "To view the report: allure serve reports/allure-results")
 